@@ -12,253 +12,1487 @@ Released under the BSD 3-Clause License.
 
 import sys
 import os
+import re
+import selectors
+import threading
+import queue
+import importlib
+import json
+import struct
+from bisect import bisect_left
+from decimal import Decimal
+import warnings
 from unicodedata import name
-import serial
 import socket
-import zmq
 import yaml
 import numpy as np
 import logging
 import pickle
-import pandas as pd 
 import random
 from datetime import datetime, timedelta, time
-from statistics import mean
-from time import sleep
-import pynmea2
+from time import sleep, perf_counter
 
 doqueue = True
 if doqueue:
     from  ipcqueue import posixmq
 
-from collections import defaultdict
-from statistics import mean
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 
+# Instrument driver modules are imported by load_drivers() when an acquirer that
+# needs them is made, so a host only needs the vendor SDKs it actually uses.
+serial = None
+zmq = None
+msgpack = None
+pd = None
+pynmea2 = None
+ljm = None
+VoltageInput = None
+DigitalInput = None
+vandaq_wire = None
+
+# {driver: [(global name, module, attribute or None for the module itself)]}
+driver_imports = {
+    'serial': [('serial', 'serial', None)],
+    'zmq': [('zmq', 'zmq', None)],
+    'msgpack': [('msgpack', 'msgpack', None)],
+    'pandas': [('pd', 'pandas', None)],
+    'pynmea2': [('pynmea2', 'pynmea2', None)],
+    'ljm': [('ljm', 'labjack.ljm', None)],
+    'phidget': [('VoltageInput', 'Phidget22.Devices.VoltageInput', 'VoltageInput'),
+                ('DigitalInput', 'Phidget22.Devices.DigitalInput', 'DigitalInput')],
+    'wire': [('vandaq_wire', 'vandaq_wire', None)],
+}
+
+# shared modules (e.g. the queue wire format) live in common/ next to acquirer/
+common_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common')
+if common_dir not in sys.path:
+    sys.path.append(common_dir)
+
+def load_drivers(drivers):
+    """Import the named driver modules into this module's namespace, if not already imported."""
+    for driver in drivers:
+        for global_name, module_name, attribute in driver_imports[driver]:
+            if globals()[global_name] is None:
+                module = importlib.import_module(module_name)
+                globals()[global_name] = getattr(module, attribute) if attribute else module
+
+# characters kept by strip_non_numeric: digits, decimal point, plus/minus sign, exponent
+non_numeric_chars = re.compile(r'[^\d.+\-eE]+')
+# same, but also keeping the unit separator used to join a line's fields for a single regex pass
+field_separator = '\x1f'
+non_numeric_chars_joined = re.compile(r'[^\d.+\-eE\x1f]+')
+
+def extract_numeric_fields(fields):
+    """Convert a list of field strings into a float array in one pass.
+
+    Non-numeric characters are stripped from every field as RecordParser.strip_non_numeric does.
+    Returns (values, errors): a float64 array, and a boolean mask of fields that could not be
+    converted (their values are NaN).
+    """
+    n = len(fields)
+    cleaned = non_numeric_chars_joined.sub('', field_separator.join(fields)).split(field_separator)
+    if len(cleaned) != n:
+        # a field contained the separator itself, clean the fields one at a time
+        cleaned = [non_numeric_chars.sub('', field) for field in fields]
+    errors = np.zeros(n, dtype=bool)
+    try:
+        values = np.array(cleaned, dtype=np.float64)
+    except ValueError:
+        values = np.empty(n, dtype=np.float64)
+        for j, field in enumerate(cleaned):
+            try:
+                values[j] = float(field)
+            except ValueError:
+                values[j] = np.nan
+                errors[j] = True
+    return values, errors
+
+class RingBuffer:
+    """Preallocated float sample buffer with O(1) append and vectorized aggregation.
+
+    Missing samples are stored as NaN and ignored when aggregating. With grow=True (the
+    default) a full buffer doubles its capacity; with grow=False it overwrites its oldest sample.
+    """
+    aggregate_methods = ('mean', 'min', 'max', 'first', 'last', 'std', 'median', 'count')
+
+    def __init__(self, capacity=64, grow=True):
+        self.data = np.empty(max(int(capacity), 1), dtype=np.float64)
+        self.grow = grow
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        size = len(self.data)
+        if self.count == size:
+            if self.grow:
+                self.data = np.concatenate((self.values(), np.empty(size, dtype=np.float64)))
+                self.start = 0
+                size *= 2
+            else:
+                # overwrite the oldest sample
+                self.start = (self.start + 1) % size
+                self.count -= 1
+        self.data[(self.start + self.count) % size] = np.nan if value is None else value
+        self.count += 1
+
+    def values(self):
+        """Return the buffered samples, oldest first."""
+        end = self.start + self.count
+        if end <= len(self.data):
+            return self.data[self.start:end]
+        return np.concatenate((self.data[self.start:], self.data[:end - len(self.data)]))
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+    def aggregate(self, method):
+        """Return the aggregate of the buffered samples, or None if there are no valid samples or the method is unknown."""
+        values = self.values()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return None
+        if method == 'mean':
+            return float(np.mean(values))
+        elif method == 'min':
+            return float(np.min(values))
+        elif method == 'max':
+            return float(np.max(values))
+        elif method == 'first':
+            return float(values[0])
+        elif method == 'last':
+            return float(values[-1])
+        elif method == 'std':
+            # sample standard deviation; a single sample has no spread
+            return float(np.std(values, ddof=1)) if len(values) > 1 else 0.0
+        elif method == 'median':
+            return float(np.median(values))
+        elif method == 'count':
+            return float(len(values))
+        return None
 
-from labjack import ljm
+class RunningAggregate:
+    """Online aggregate of a sample stream in O(1) memory.
+
+    Keeps a running sum, min/max, first/last and Welford variance instead of the samples
+    themselves. Missing samples (None or NaN) are ignored. With numeric=False only first,
+    last and count are tracked, which is what string items need.
+    """
+    aggregate_methods = ('mean', 'min', 'max', 'first', 'last', 'std', 'count')
+
+    def __init__(self, numeric=True):
+        self.numeric = numeric
+        self.clear()
+
+    def __len__(self):
+        return self.appended
+
+    def clear(self):
+        self.appended = 0  # samples appended, including missing ones
+        self.count = 0     # valid samples
+        self.total = 0.0
+        self.running_mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.first = None
+        self.last = None
+
+    def append(self, value):
+        self.appended += 1
+        if value is None or (self.numeric and value != value):
+            return
+        self.count += 1
+        if self.count == 1:
+            self.first = value
+            self.min = value
+            self.max = value
+        self.last = value
+        if self.numeric:
+            self.total += value
+            if value < self.min:
+                self.min = value
+            elif value > self.max:
+                self.max = value
+            delta = value - self.running_mean
+            self.running_mean += delta / self.count
+            self.m2 += delta * (value - self.running_mean)
+
+    def aggregate(self, method):
+        """Return the aggregate of the samples, or None if there are no valid samples or the method is unknown."""
+        if self.count == 0:
+            return None
+        if not self.numeric:
+            if method == 'first':
+                return self.first
+            elif method == 'last':
+                return self.last
+            elif method == 'count':
+                return float(self.count)
+            return None
+        if method == 'mean':
+            return float(self.total / self.count)
+        elif method == 'min':
+            return float(self.min)
+        elif method == 'max':
+            return float(self.max)
+        elif method == 'first':
+            return float(self.first)
+        elif method == 'last':
+            return float(self.last)
+        elif method == 'count':
+            return float(self.count)
+        elif method == 'std':
+            # sample standard deviation; a single sample has no spread
+            return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else 0.0
+        return None
+
+class TimestampDecoder:
+    """Fast replacement for datetime.strptime with one fixed-width numeric format.
+
+    Formats built from %Y %y %m %d %H %M %S %f and literal characters (e.g. '%Y-%m-%d %H:%M:%S',
+    '%d/%m/%y') are decoded by slicing. Anything that does not fit the fixed-width layout is
+    handed to datetime.strptime, so results and errors are the same as before. The date part is
+    memoized, since it only changes once a day; the memo is one (key, date) tuple, replaced
+    whole, because decoders are shared by parsers running on different threads.
+    """
+    directive_widths = {'Y': 4, 'y': 2, 'm': 2, 'd': 2, 'H': 2, 'M': 2, 'S': 2, 'f': 6}
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.fields = {}    # {directive: (start, end)}
+        self.literals = []  # [(position, character)]
+        self.fast = True
+        pos = 0
+        i = 0
+        while i < len(fmt):
+            if fmt[i] == '%':
+                directive = fmt[i + 1] if i + 1 < len(fmt) else ''
+                if directive == '%':
+                    self.literals.append((pos, '%'))
+                    pos += 1
+                elif directive in self.directive_widths and directive not in self.fields:
+                    width = self.directive_widths[directive]
+                    self.fields[directive] = (pos, pos + width)
+                    pos += width
+                else:
+                    self.fast = False
+                    break
+                i += 2
+            else:
+                self.literals.append((pos, fmt[i]))
+                pos += 1
+                i += 1
+        self.length = pos
+        if 'Y' in self.fields and 'y' in self.fields:
+            self.fast = False
+
+        # memoize the date when its fields form one span not shared with time fields
+        date_spans = [self.fields[d] for d in 'Yymd' if d in self.fields]
+        self.date_span = None
+        if date_spans:
+            begin = min(span[0] for span in date_spans)
+            end = max(span[1] for span in date_spans)
+            if all(span[1] <= begin or span[0] >= end for d, span in self.fields.items() if d not in 'Yymd'):
+                self.date_span = (begin, end)
+        self.last_date = (None, None)  # (date_key, (year, month, day))
+
+    def _number(self, string, directive, default):
+        span = self.fields.get(directive)
+        if span is None:
+            return default
+        chunk = string[span[0]:span[1]]
+        if not (chunk.isascii() and chunk.isdigit()):
+            raise ValueError(chunk)
+        return int(chunk)
+
+    def _date(self, string):
+        year = self._number(string, 'Y', None)
+        if year is None:
+            year = self._number(string, 'y', None)
+            if year is None:
+                year = 1900
+            elif year <= 68:
+                year += 2000
+            else:
+                year += 1900
+        return (year, self._number(string, 'm', 1), self._number(string, 'd', 1))
+
+    def decode(self, string):
+        if not self.fast or len(string) != self.length:
+            return datetime.strptime(string, self.fmt)
+        try:
+            for pos, character in self.literals:
+                if string[pos] != character:
+                    raise ValueError(character)
+            if self.date_span:
+                date_key = string[self.date_span[0]:self.date_span[1]]
+                last_key, date = self.last_date
+                if date_key != last_key:
+                    date = self._date(string)
+                    datetime(*date)  # validate before caching
+                    self.last_date = (date_key, date)
+                year, month, day = date
+            else:
+                year, month, day = self._date(string)
+            return datetime(year, month, day,
+                            self._number(string, 'H', 0), self._number(string, 'M', 0),
+                            self._number(string, 'S', 0), self._number(string, 'f', 0))
+        except ValueError:
+            # let strptime decide, and raise its own error if the string really is bad
+            return datetime.strptime(string, self.fmt)
+
+timestamp_decoders = {}  # {format: TimestampDecoder}
+
+def get_timestamp_decoder(fmt):
+    decoder = timestamp_decoders.get(fmt)
+    if decoder is None:
+        decoder = timestamp_decoders[fmt] = TimestampDecoder(fmt)
+    return decoder
+
+alignment_epoch = datetime(1970, 1, 1)
+
+def window_start(t, window):
+    """Return the start of the window of length `window` (a timedelta) containing datetime t."""
+    return t - (t - alignment_epoch) % window
+
+def instrument_to_wall_time(instrument_time, now):
+    """Place an instrument clock time on the server calendar.
+
+    Instruments that report only a time of day are parsed on 1900-01-01 (or 1900-01-02 after a
+    24:00 rollover); those get the server date, taking the nearest day to `now`.
+    """
+    if instrument_time.year != 1900:
+        return instrument_time
+    wall_time = datetime.combine(now.date(), instrument_time.time())
+    if wall_time - now > timedelta(hours=12):
+        wall_time -= timedelta(days=1)
+    elif now - wall_time > timedelta(hours=12):
+        wall_time += timedelta(days=1)
+    return wall_time
+
+def make_sample_buffer(aggregate_mode, agg_method, capacity=64):
+    """Return the sample buffer for a numeric item: a RunningAggregate in 'online' mode, else a RingBuffer.
+
+    Methods that need every sample (median) always get a RingBuffer.
+    """
+    if aggregate_mode == 'online' and agg_method in RunningAggregate.aggregate_methods:
+        return RunningAggregate()
+    return RingBuffer(capacity)
+
+def aggregate_columns(block, methods):
+    """Aggregate each column of a 2-D sample block (samples x channels) with its own method.
+
+    Columns sharing a method are aggregated together in one vectorized call. NaN samples
+    are ignored, as RingBuffer.aggregate ignores them. Returns a float array with NaN for
+    columns without valid samples or with an unknown method.
+    """
+    result = np.full(block.shape[1], np.nan)
+    valid = ~np.isnan(block)
+    counts = valid.sum(axis=0)
+    with warnings.catch_warnings():
+        # all-NaN columns are expected and come out as NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for method in set(methods):
+            cols = np.array([i for i, m in enumerate(methods) if m == method])
+            values = block[:, cols]
+            if method == 'mean':
+                result[cols] = np.nanmean(values, axis=0)
+            elif method == 'min':
+                result[cols] = np.nanmin(values, axis=0)
+            elif method == 'max':
+                result[cols] = np.nanmax(values, axis=0)
+            elif method == 'first':
+                rows = np.argmax(valid[:, cols], axis=0)
+                result[cols] = values[rows, np.arange(len(cols))]
+            elif method == 'last':
+                rows = len(values) - 1 - np.argmax(valid[::-1, cols], axis=0)
+                result[cols] = values[rows, np.arange(len(cols))]
+            elif method == 'std':
+                # sample standard deviation; a single sample has no spread
+                result[cols] = np.where(counts[cols] > 1, np.nanstd(values, axis=0, ddof=1), 0.0)
+            elif method == 'median':
+                result[cols] = np.nanmedian(values, axis=0)
+            elif method == 'count':
+                result[cols] = counts[cols]
+    result[counts == 0] = np.nan
+    return result
+
+class StreamSpec:
+    """Compiled form of a stream config (the 'stream' block, a 'poll' entry or a network dictionary).
+
+    The comma separated lists in the config are split once here, so parsing a line
+    only has to split the line itself.
+    """
+    def __init__(self, config_dict, platform, instrument, item_delimiter=','):
+        self.config_dict = config_dict  # keeps the config alive so its id() stays unique
+        self.item_delimiter = config_dict.get('item_delimiter', item_delimiter)
+        self.items = config_dict['items'].split(',')
+        self.formats = config_dict['formats'].split(',')
+        self.num_items = len(self.items)
+        units = config_dict['units'].split(',')
+        acqTypes = config_dict['acqTypes'].split(',')
+        scalers = config_dict.get('scalers', None)
+        scalers = scalers.split(',') if scalers else []
+        aggregate_items = config_dict.get('aggregate_items')
+        aggregate_items = aggregate_items.split(',') if aggregate_items else []
+
+        self.aggregate_seconds = config_dict.get('aggregate_seconds')
+        self.aggregate_mode = config_dict.get('aggregate_mode', 'buffered')
+        # 'wall' or 'instrument' aligns aggregation windows to whole multiples of aggregate_seconds
+        self.aggregate_align = config_dict.get('aggregate_align')
+        self.aggregate_window = timedelta(seconds=self.aggregate_seconds) if self.aggregate_seconds else None
+        self.aggregating = bool(self.aggregate_seconds and aggregate_items)
+
+        # instrument clock columns: (index, TimestampDecoder) or None
+        self.datetime_column = self._time_column('inst_datetime')
+        self.date_column = self._time_column('inst_date')
+        self.time_column = self._time_column('inst_time')
+
+        # one entry per item that is not skipped with 'x':
+        # (index, parameter, kind, slot, aggregate method, record template)
+        # kind is 'f' for floats, 's' for strings and None for anything else (e.g. date formats);
+        # slot is the position of a float item in the array returned by numeric_values()
+        self.columns = []
+        self.float_indexes = []
+        float_scalers = []
+        for i, item in enumerate(self.items):
+            if item == 'x':
+                continue
+            fmt = self.formats[i]
+            if fmt == 'f':
+                kind = 'f'
+            elif fmt in ['s', 'h']:
+                kind = 's'
+            else:
+                kind = None
+            slot = None
+            if kind == 'f':
+                slot = len(self.float_indexes)
+                self.float_indexes.append(i)
+                float_scalers.append(float(scalers[i]) if i < len(scalers) else 1.0)
+            agg_method = aggregate_items[i] if i < len(aggregate_items) else None
+            template = {
+                'platform': platform,
+                'instrument': instrument,
+                'parameter': item,
+                'unit': units[i],
+                'acquisition_type': acqTypes[i],
+            }
+            self.columns.append((i, item, kind, slot, agg_method, template))
+        self.scales = np.array(float_scalers, dtype=np.float64)
+        self.scaled = bool(np.any(self.scales != 1.0))
+
+    def _time_column(self, name):
+        if name in self.items:
+            idx = self.items.index(name)
+            return (idx, get_timestamp_decoder(self.formats[idx]))
+        return None
+
+    def split(self, line):
+        return line.strip().split(self.item_delimiter)
+
+    def numeric_values(self, parts):
+        """Return (values, errors) for the float items of a split line, scaled, in slot order."""
+        nparts = len(parts)
+        fields = [parts[i] if i < nparts else '' for i in self.float_indexes]
+        values, errors = extract_numeric_fields(fields)
+        if self.scaled:
+            values *= self.scales
+        return values.tolist(), errors.tolist()
+
+    def object_numeric_values(self, values):
+        """Like numeric_values, for a list of already decoded values (e.g. floats from a network
+        message) rather than text fields. Non-finite values count as errors, as their text would."""
+        nvalues = len(values)
+        fields = [values[i] if i < nvalues else np.nan for i in self.float_indexes]
+        try:
+            floats = np.array(fields, dtype=np.float64)
+        except (TypeError, ValueError):
+            # something other than plain numbers: fall back to parsing the text of every field
+            return self.numeric_values([str(v) for v in values])
+        errors = ~np.isfinite(floats)
+        if self.scaled:
+            floats *= self.scales
+        return floats.tolist(), errors.tolist()
+
+    @property
+    def has_time_columns(self):
+        return bool(self.datetime_column or self.date_column or self.time_column)
+
+    def instrument_datetime(self, parts):
+        """Return the instrument clock time carried in a split line, or None. Raises on unparseable times."""
+        instrument_datetime = None
+        instrument_date = None
+        instrument_time = None
+        next_day = False
+        if self.datetime_column:
+            idx, decoder = self.datetime_column
+            dt_string = parts[idx]
+            if '24:' in dt_string:
+                next_day = True
+                dt_string = dt_string.replace('24:','00:')
+            instrument_datetime = decoder.decode(dt_string)
+            if next_day:
+                instrument_datetime += timedelta(days=1)
+            instrument_datetime = instrument_datetime.replace(microsecond=0)
+        elif self.date_column:
+            idx, decoder = self.date_column
+            instrument_date = decoder.decode(parts[idx]).date()
+        if self.time_column:
+            idx, decoder = self.time_column
+            dt_string = parts[idx]
+            if '24:' in dt_string:
+                next_day = True
+                dt_string = dt_string.replace('24:','00:')
+            instrument_time = decoder.decode(dt_string).time()
+        if instrument_time and instrument_date:
+            instrument_datetime = datetime.combine(instrument_date, instrument_time)
+            instrument_datetime = instrument_datetime.replace(microsecond=0)
+        elif instrument_time and not instrument_date:
+            instrument_datetime = datetime.combine(datetime(1900, 1, 1, 0, 0, 0).date(), instrument_time)
+            instrument_datetime = instrument_datetime.replace(microsecond=0)
+            if next_day:
+                instrument_datetime += timedelta(days=1)
+        return instrument_datetime
 
-from Phidget22.Phidget import *
-from Phidget22.Devices.VoltageInput import *
-from Phidget22.Devices.DigitalInput import *
 
 class RecordParser:
-    def __init__(self, config, logger):
+    def __init__(self, config, logger, stats=None):
         self.config = config
-        self.buffer = defaultdict(lambda: defaultdict(list))
+        self.stats = stats  # AcquirerStats counting parse errors, if any
+        self.buffer = defaultdict(dict)  # {instrument: {item: RingBuffer or RunningAggregate}}
         self.last_aggregate_time = {}  # Tracks the last aggregation timestamp for each instrument
+        self.open_windows = {}  # Start of the open aligned aggregation window for each instrument
+        self.late_sample_logged = set()  # instruments whose current run of late samples has been logged
         self.logger = logger
+        self.specs = {}  # {id(config_dict): StreamSpec}
+        self.measurement_delay = timedelta(seconds=self.config.get('measurement_delay_secs', 0))
+        self.compile_stream_specs()
+
+    def compile_stream_specs(self):
+        """Compile every stream config found in the acquirer config so parsing never has to."""
+        stream_configs = []
+        if isinstance(self.config.get('stream'), dict):
+            stream_configs.append(self.config['stream'])
+        if isinstance(self.config.get('poll'), dict):
+            stream_configs += [poll for poll in self.config['poll'].values() if isinstance(poll, dict)]
+        if isinstance(self.config.get('dictionaries'), str):
+            stream_configs += [self.config[d] for d in self.config['dictionaries'].split(',') if isinstance(self.config.get(d), dict)]
+        for config_dict in stream_configs:
+            if 'items' in config_dict:
+                try:
+                    self.get_spec(config_dict)
+                except Exception as e:
+                    self.logger.error(f'Error compiling stream config {config_dict}: {str(e)}')
+
+    def get_spec(self, config_dict, item_delimiter=','):
+        spec = self.specs.get(id(config_dict))
+        if spec is None:
+            spec = StreamSpec(config_dict, self.config['platform'], self.config['instrument'], item_delimiter)
+            self.specs[id(config_dict)] = spec
+        return spec
 
     def strip_non_numeric(self, input_string):
         """Return a string with all non-numeric characters removed (keeps digits, decimal point, plus/minus sign, exponent)."""
-        return ''.join(c for c in input_string if c.isdigit() or c in ['.', '-','+','e','E' ])
+        return non_numeric_chars.sub('', input_string)
 
     def parse_simple_string_to_record(self, line, config_dict=None, item_delimiter=','):
-        global logger
         if not config_dict:
             config_dict = self.config['stream']
-
-        if 'item_delimiter' in config_dict:
-            item_delimiter = config_dict['item_delimiter']
-
-        aggregate_seconds = config_dict.get('aggregate_seconds')
-        aggregate_items = config_dict.get('aggregate_items')
-
+        spec = self.get_spec(config_dict, item_delimiter)
+        return self._parse_parts(spec.split(line), spec, line)
+
+    def parse_values_to_record(self, values, config_dict):
+        """Make records from a list of values aligned with the config's items, without going
+        through a delimited text line. Numbers are used as they are; anything else is parsed
+        from its text as parse_simple_string_to_record would."""
+        spec = self.get_spec(config_dict)
+        if spec.aggregating or spec.has_time_columns:
+            # these paths work on text fields
+            return self._parse_parts([str(v) for v in values], spec, values)
+        return self._parse_direct(values, spec, values, None, spec.object_numeric_values(values))
+
+    def _parse_parts(self, parts, spec, line):
         # Check for an instrument datetime
-        instrument_datetime = None
-        instrument_date = None
-        instrument_time = None
-        next_day = False
-        items = config_dict['items'].split(',')
-        parts = line.split(config_dict['item_delimiter'])
-        formats = config_dict['formats'].split(',')
-        scalers = config_dict.get('scalers', None)
-        if scalers:
-            scalers = scalers.split(',')
         try:
-            if 'inst_datetime' in items:
-                idx = items.index('inst_datetime')
-                dt_string = parts[idx]
-                if '24:' in dt_string:
-                    next_day = True
-                    dt_string = dt_string.replace('24:','00:')
-                instrument_datetime = datetime.strptime(dt_string, formats[idx])
-                if next_day:
-                    instrument_datetime += timedelta(days=1)
-                instrument_datetime = instrument_datetime.replace(microsecond=0)
-            elif 'inst_date' in items:
-                idx = items.index('inst_date')
-                instrument_date = datetime.strptime(parts[idx], formats[idx]).date()
-            if 'inst_time' in items:
-                idx = items.index('inst_time')
-                dt_string = parts[idx]
-                if '24:' in dt_string:
-                    next_day = True
-                    dt_string = dt_string.replace('24:','00:')
-                instrument_time = datetime.strptime(dt_string, formats[idx]).time()
-            if instrument_time and instrument_date:
-                instrument_datetime = datetime.combine(instrument_date, instrument_time)        
-                instrument_datetime = instrument_datetime.replace(microsecond=0)
-            elif instrument_time and not instrument_date:
-                instrument_datetime = datetime.combine(datetime(1900, 1, 1, 0, 0, 0).date(), instrument_time)  
-                instrument_datetime = instrument_datetime.replace(microsecond=0)
-                if next_day:
-                    instrument_datetime += timedelta(days=1)
-        except Exception as e:                                      
+            instrument_datetime = spec.instrument_datetime(parts)
+        except Exception as e:
             self.logger.error(f'Error parsing instrument data line: line = {line}, error = {str(e)}')
+            if self.stats:
+                self.stats.count('parse_errors')
             return None
-        
+
         # Bypass aggregation if no aggregate settings
-        if not aggregate_seconds or not aggregate_items:
-            return self._parse_direct(line, config_dict, item_delimiter, instrument_datetime)
+        if not spec.aggregating:
+            return self._parse_direct(parts, spec, line, instrument_datetime)
 
         instrument_key = self.config['instrument']
         current_time = datetime.now()
 
-        # Parse the line into parts
-        parts = line.strip().split(item_delimiter)
-        items = config_dict['items'].split(',')
+        if spec.aggregate_align:
+            return self._aggregate_aligned(parts, spec, instrument_key, instrument_datetime, current_time)
 
         # Buffer the data
-        for i, part in enumerate(parts):
-            if items[i] != 'x':
-                try:
-                    if config_dict['formats'].split(',')[i] == 'f':
-                        value = float(self.strip_non_numeric(part))
-                        if scalers and scalers[i] != '1':
-                            value *= float(scalers[i])
-                        self.buffer[instrument_key][items[i]].append(value)
-                    elif config_dict['formats'].split(',')[i] in ['s', 'h']:
-                        self.buffer[instrument_key][items[i]].append(part)
-                except ValueError:
-                    self.buffer[instrument_key][items[i]].append(None)
+        self._buffer_parts(parts, spec, instrument_key)
 
         # Check if aggregation interval has elapsed
         if instrument_key not in self.last_aggregate_time:
-            self.last_aggregate_time[instrument_key] = current_time            
+            self.last_aggregate_time[instrument_key] = current_time
         time_so_far = (current_time - self.last_aggregate_time[instrument_key]).total_seconds()
-        if time_so_far >= aggregate_seconds:
+        if time_so_far >= spec.aggregate_seconds:
             if instrument_datetime:
                 # if we are aggregating, the instrument time should be the beginning of the aggregation period
-                instrument_datetime -= timedelta(seconds = aggregate_seconds)
-            result = self._aggregate_buffer(instrument_key, config_dict, instrument_datetime)
+                instrument_datetime -= timedelta(seconds = spec.aggregate_seconds)
+            result = self._aggregate_buffer(instrument_key, spec, instrument_datetime)
             self.last_aggregate_time[instrument_key] = current_time
             return result
 
         return None
 
-    def _parse_direct(self, line, config_dict, item_delimiter, instrument_datetime):
-        global logger
-        parts = line.strip().split(item_delimiter)
-        items = config_dict['items'].split(',')
-        formats = config_dict['formats'].split(',')
-        units = config_dict['units'].split(',')
-        acqTypes = config_dict['acqTypes'].split(',')
-        scalers = config_dict.get('scalers', None)
-        if scalers:
-            scalers = scalers.split(',')
-        
+    def _buffer_parts(self, parts, spec, instrument_key):
+        instrument_buffer = self.buffer[instrument_key]
+        values, errors = spec.numeric_values(parts)
+        nparts = len(parts)
+        for i, item, kind, slot, agg_method, template in spec.columns:
+            if i >= nparts:
+                break
+            if kind == 'f':
+                if item not in instrument_buffer:
+                    instrument_buffer[item] = make_sample_buffer(spec.aggregate_mode, agg_method)
+                instrument_buffer[item].append(None if errors[slot] else values[slot])
+            elif kind == 's':
+                if item not in instrument_buffer:
+                    # strings only aggregate as first or last, so they never need the samples kept
+                    instrument_buffer[item] = RunningAggregate(numeric=False)
+                instrument_buffer[item].append(parts[i])
+
+    def _aggregate_aligned(self, parts, spec, instrument_key, instrument_datetime, current_time):
+        """Buffer a line into a window aligned to whole multiples of aggregate_seconds.
+
+        Windows are taken from the wall clock ('wall') or from the instrument clock ('instrument',
+        placed on the server calendar, and falling back to the wall clock for lines without an
+        instrument time). The open window is emitted when the first sample of a later window
+        arrives. A sample for the window just before the open one is late and dropped; an
+        instrument clock stepping back further (e.g. a resync) emits the open window and starts
+        over from the sample's window.
+        """
+        by_instrument = spec.aggregate_align == 'instrument' and instrument_datetime is not None
+        if by_instrument:
+            window = window_start(instrument_to_wall_time(instrument_datetime, current_time), spec.aggregate_window)
+        else:
+            window = window_start(current_time, spec.aggregate_window)
+
+        result = None
+        open_window = self.open_windows.get(instrument_key)
+        if open_window is None:
+            self.open_windows[instrument_key] = window
+        elif window > open_window or open_window - window > spec.aggregate_window:
+            if window < open_window:
+                self.logger.warning(f'Instrument clock stepped back from aggregation window {open_window} to {window}, closing the open window')
+            if by_instrument:
+                result = self._aggregate_buffer(instrument_key, spec, open_window, open_window - self.measurement_delay)
+            else:
+                if instrument_datetime:
+                    # the instrument time should be the beginning of the aggregation period
+                    instrument_datetime -= spec.aggregate_window
+                result = self._aggregate_buffer(instrument_key, spec, instrument_datetime, open_window - self.measurement_delay)
+            self.open_windows[instrument_key] = window
+        elif window < open_window:
+            if instrument_key not in self.late_sample_logged:
+                self.logger.warning(f'Dropping late sample for closed aggregation window {window}, open window is {open_window}')
+                self.late_sample_logged.add(instrument_key)
+            return None
+        self.late_sample_logged.discard(instrument_key)
+
+        self._buffer_parts(parts, spec, instrument_key)
+        return result
+
+    def _parse_direct(self, parts, spec, line, instrument_datetime, numeric_values=None):
         resultList = []
         acquisition_time = datetime.now().replace(microsecond=0)
-        sample_time = acquisition_time - timedelta(seconds=self.config.get('measurement_delay_secs', 0))
-        
-        for i in range(len(parts)):
-            if items[i] != 'x':
-                try:
-                    value = None
-                    string = None
-                    if formats[i] == 'f':
-                        value = float(self.strip_non_numeric(parts[i]))
-                        if scalers and scalers[i] != '1':
-                            value *= float(scalers[i])
-                    elif formats[i] in ['s','h']:
-                        string = parts[i]
-                    
-                    resultDict = {
-                        'platform': self.config['platform'],
-                        'instrument': self.config['instrument'],
-                        'parameter': items[i],
-                        'unit': units[i],
-                        'acquisition_type': acqTypes[i],
-                        'acquisition_time': acquisition_time,
-                        'sample_time': sample_time,
-                        'instrument_time': instrument_datetime
-                    }
-                    if value is not None:
-                        resultDict['value'] = value
-                    if string is not None:
-                        resultDict['string'] = string
-
-                    resultList.append(resultDict)
-                except ValueError as e:
-                    self.logger.error(f'Error parsing instrument data item: line = {line}, item = {items[i]}, error = {str(e)}')
+        sample_time = acquisition_time - self.measurement_delay
+
+        values, errors = numeric_values or spec.numeric_values(parts)
+        nparts = len(parts)
+        for i, item, kind, slot, agg_method, template in spec.columns:
+            if i >= nparts:
+                break
+            value = None
+            string = None
+            if kind == 'f':
+                if errors[slot]:
+                    self.logger.error(f'Error parsing instrument data item: line = {line}, item = {item}, error = could not convert {parts[i]!r} to float')
+                    if self.stats:
+                        self.stats.count('parse_errors')
                     continue
+                value = values[slot]
+            elif kind == 's':
+                string = str(parts[i])
 
-        return resultList
+            resultDict = dict(template)
+            resultDict['acquisition_time'] = acquisition_time
+            resultDict['sample_time'] = sample_time
+            resultDict['instrument_time'] = instrument_datetime
+            if value is not None:
+                resultDict['value'] = value
+            if string is not None:
+                resultDict['string'] = string
 
-    def _aggregate_buffer(self, instrument_key, config_dict, instrument_datetime):
-        aggregate_items = config_dict['aggregate_items'].split(',')
-        items = config_dict['items'].split(',')
-        formats = config_dict['formats'].split(',')
-        units = config_dict['units'].split(',')
-        acqTypes = config_dict['acqTypes'].split(',')
+            resultList.append(resultDict)
+
+        return resultList
 
+    def _aggregate_buffer(self, instrument_key, spec, instrument_datetime, sample_time=None):
         resultList = []
         acquisition_time = datetime.now().replace(microsecond=0)
-        sample_time = acquisition_time - timedelta(seconds=self.config.get('measurement_delay_secs', 0))
+        if sample_time is None:
+            sample_time = acquisition_time - self.measurement_delay
+
+        instrument_buffer = self.buffer[instrument_key]
+        for i, item, kind, slot, agg_method, template in spec.columns:
+            values = instrument_buffer.get(item)
+            if not values:
+                continue
+
+            aggregated_value = None
+            if kind == 'f':
+                aggregated_value = values.aggregate(agg_method)
+                if aggregated_value is None and agg_method in RingBuffer.aggregate_methods:
+                    # every sample in the period failed to parse
+                    values.clear()
+                    continue
+            elif kind == 's':
+                if agg_method in ['first', 'last']:
+                    aggregated_value = values.aggregate(agg_method)
 
+            resultDict = dict(template)
+            resultDict['acquisition_time'] = acquisition_time
+            resultDict['sample_time'] = sample_time
+            resultDict['instrument_time'] = instrument_datetime
+            if aggregated_value is not None:
+                if kind == 'f':
+                    resultDict['value'] = aggregated_value
+                elif kind == 's':
+                    resultDict['string'] = aggregated_value
 
-        for i, item in enumerate(items):
-            if item != 'x':
-                values = self.buffer[instrument_key][item]
-                if not values:
-                    continue
+            resultList.append(resultDict)
 
-                agg_method = aggregate_items[i]
-                aggregated_value = None
-                if formats[i] == 'f':
-                    values = [float(v) for v in values if v is not None]  # Filter out None values
-                    if agg_method == 'mean':
-                        aggregated_value = mean(values)
-                    elif agg_method == 'min':
-                        aggregated_value = min(values)
-                    elif agg_method == 'max':
-                        aggregated_value = max(values)
-                    elif agg_method == 'first':
-                        aggregated_value = values[0]
-                    elif agg_method == 'last':
-                        aggregated_value = values[-1]
-                elif formats[i] in ['s', 'h']:
-                    if agg_method == 'first':
-                        aggregated_value = values[0]
-                    elif agg_method == 'last':
-                        aggregated_value = values[-1]
-
-                resultDict = {
-                    'platform': self.config['platform'],
-                    'instrument': self.config['instrument'],
-                    'parameter': item,
-                    'unit': units[i],
-                    'acquisition_type': acqTypes[i],
-                    'acquisition_time': acquisition_time,
-                    'sample_time': sample_time,
-                    'instrument_time': instrument_datetime,  # Assumes current time for instrument_time
-                }
-                if aggregated_value is not None:
-                    if formats[i] == 'f':
-                        resultDict['value'] = aggregated_value
-                    elif formats[i] in ['s','h']:
-                        resultDict['string'] = aggregated_value
-
-                resultList.append(resultDict)
-
-                # Clear buffer for the item
-                self.buffer[instrument_key][item].clear()
+            # Clear buffer for the item
+            values.clear()
 
         return resultList
 
 logger = None
 
+# Posix queues owned by a multi-instrument host process, keyed by queue name.
+# Acquirers whose queue name is found here use it instead of opening their own.
+shared_queues = {}
+
+# Spilling queues by spill file path, so a rebuilt acquirer stops the one it replaces
+# before replaying the same file.
+spilling_queues = {}
+
+class EncodedMessage(bytes):
+    """A queue message that has already been encoded (see encode_message)."""
+    def __new__(cls, data, records=1):
+        message = super().__new__(cls, data)
+        message.records = records  # number of records in the message
+        return message
+
+class QueueSerializer:
+    """Posix queue serializer: pickles like ipcqueue's PickleSerializer, but passes
+    EncodedMessage through untouched so it is not encoded twice."""
+    @staticmethod
+    def dumps(obj):
+        if isinstance(obj, EncodedMessage):
+            return obj
+        return pickle.dumps(obj, protocol=1)
+
+    @staticmethod
+    def loads(data):
+        return pickle.loads(data)
+
+def pickle_message(records):
+    return EncodedMessage(pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL), len(records))
+
+def wire_message(records):
+    # columnar binary format (common/vandaq_wire.py); records it cannot carry are pickled instead
+    try:
+        return EncodedMessage(vandaq_wire.encode_records(records), len(records))
+    except Exception as e:
+        logging.getLogger(__name__).debug(f'Sending pickled message, not wire format: {e}')
+        return pickle_message(records)
+
+def file_safe_name(name):
+    return re.sub(r'[^\w.-]', '_', name)
+
+def open_posix_queue(qname, maxmsgs, maxmsgsize, logger, destroy_first=False):
+    qExists = False
+    queue = None
+    # check if queue already exists
+    try:
+        queue = posixmq.Queue(qname, serializer=QueueSerializer)
+        qExists = True
+    except (OSError, posixmq.QueueError) as e:
+        logger.debug(f'Queue {qname} does not yet exist: {e}')
+    if qExists:
+        if destroy_first:
+            queue.close()
+            queue.unlink()
+            qExists = False
+        else:
+            attribs = queue.qattr()
+            # if queue exists, check to make sure it is big enough
+            if attribs['max_size'] < maxmsgs or attribs['max_msgbytes'] < maxmsgsize:
+                # destroy the queue if it is too small
+                queue.close()
+                queue.unlink()
+                qExists = False
+    if not qExists:
+        # create the queue if it doesn't exist or has been detroyed
+        try:
+            queue = posixmq.Queue(qname, maxsize=maxmsgs, maxmsgsize=maxmsgsize, serializer=QueueSerializer)
+        except (OSError, posixmq.QueueError) as e:
+            logger.error(f'Queue {qname} failure to create: {e}')
+        else:
+            # Change permissions to rw-rw-rw-
+            try:
+                os.chmod(f'/dev/mqueue{qname}', 0o666)
+            except Exception as e:
+                logger.error(f'Failed to change permissions for queue {qname}: {e}')
+    return queue
+
+class SharedQueueWriter:
+    """Outbound queue shared by all acquirers running in one host process.
+
+    Acquirer threads put() into a bounded in-process queue (blocking when it is full, like
+    a full posix queue), and a single writer thread moves messages to the posix queue.
+    """
+    def __init__(self, queue_config, logger, max_pending=1000):
+        self.name = queue_config['name']
+        self.logger = logger
+        self.queue = open_posix_queue(self.name, queue_config['max_msgs'], queue_config['max_msg_size'], logger)
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(target=self.run, name=f'queue writer {self.name}', daemon=True)
+        self.thread.start()
+
+    def put(self, item, block=True, timeout=None):
+        self.pending.put(item, block, timeout)
+
+    def qsize(self):
+        return self.pending.qsize()
+
+    def run(self):
+        while True:
+            item = self.pending.get()
+            try:
+                self.queue.put(item)
+            except Exception as e:
+                self.logger.error(f'Error writing to queue {self.name}: {e}')
+
+class QueueBatcher:
+    """Packs the record lists of many send_measurement_to_queue() calls into one queue message.
+
+    A message is sent when its estimated pickled size reaches max_msg_size or when its oldest
+    record has waited latency_secs, whichever comes first. Each call's records stay together
+    in one message (GPS acquirers rely on that to keep lat and lon paired), and the collector
+    receives a flat list of records just like an unbatched message.
+    """
+    def __init__(self, queue, max_msg_size, latency_secs, logger, encode=pickle_message, report_secs=60, stats=None):
+        self.queue = queue
+        self.stats = stats  # AcquirerStats timing the queue puts, if any
+        self.encode = encode
+        self.max_msg_size = max_msg_size
+        self.latency_secs = latency_secs
+        self.logger = logger
+        self.report_secs = report_secs
+        self.groups = []
+        self.pending_records = 0
+        self.oldest = None
+        self.bytes_per_record = None  # learned from the messages actually sent
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.put_lock = threading.Lock()
+        # statistics for the periodic fill report
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.splits = 0
+        self.last_report = perf_counter()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='queue batcher', daemon=True)
+        self.thread.start()
+
+    def close(self):
+        # stop the batcher thread and send whatever is still pending
+        with self.lock:
+            self.running = False
+            self.wakeup.notify()
+        self.thread.join()
+        self.flush()
+
+    def capacity(self):
+        # records that should fit in one message, leaving some room for the estimate being off
+        if not self.bytes_per_record:
+            return 1
+        return max(1, int(0.9 * self.max_msg_size / self.bytes_per_record))
+
+    def send(self, records):
+        with self.lock:
+            if not self.groups:
+                self.oldest = perf_counter()
+                self.wakeup.notify()
+            self.groups.append(records)
+            self.pending_records += len(records)
+            full = self.pending_records >= self.capacity()
+        if full:
+            self.flush()
+
+    def flush(self):
+        # put_lock keeps messages in order when the caller and the batcher thread both flush
+        with self.put_lock:
+            with self.lock:
+                groups = self.groups
+                self.groups = []
+                self.pending_records = 0
+                self.oldest = None
+            if groups:
+                self.put_groups(groups)
+
+    def run(self):
+        # sends whatever is pending once it is latency_secs old
+        while True:
+            with self.lock:
+                while self.running and self.oldest is None:
+                    self.wakeup.wait()
+                if not self.running:
+                    return
+                wait_secs = self.oldest + self.latency_secs - perf_counter()
+                if wait_secs > 0:
+                    self.wakeup.wait(wait_secs)
+                    continue
+            self.flush()
+
+    def put_groups(self, groups):
+        records = [record for group in groups for record in group]
+        data = self.encode(records)
+        if len(data) > self.max_msg_size:
+            self.bytes_per_record = len(data) / len(records)
+            if len(groups) > 1:
+                # split at a call boundary and try each half
+                self.splits += 1
+                half = len(groups) // 2
+                self.put_groups(groups[:half])
+                self.put_groups(groups[half:])
+                return
+            if len(records) > 1:
+                # a single call's records are too big for one message, so they have to be separated
+                self.splits += 1
+                self.logger.warning(f'{len(records)} records of one measurement ({len(data)} bytes) exceed max_msg_size {self.max_msg_size}, splitting them')
+                chunk = self.capacity()
+                for start in range(0, len(records), chunk):
+                    self.put_groups([records[start:start + chunk]])
+                return
+            self.logger.error(f'Record of {len(data)} bytes exceeds max_msg_size {self.max_msg_size}, dropped: {records[0]}')
+            return
+        try:
+            if self.stats:
+                put_counting_full(self.queue, data, self.stats)
+            else:
+                self.queue.put(data)
+        except Exception as e:
+            self.logger.error(f'Error putting batch to queue: {e}')
+            return
+        self.bytes_per_record = len(data) / len(records)
+        self.messages_sent += 1
+        self.bytes_sent += len(data)
+        self.logger.debug(f'queued {len(records)} records in {len(data)} bytes, message {100 * len(data) / self.max_msg_size:.0f}% full')
+        self.report()
+
+    def report(self):
+        now = perf_counter()
+        if now - self.last_report >= self.report_secs:
+            fill = 100 * self.bytes_sent / (self.messages_sent * self.max_msg_size)
+            self.logger.info(f'Queue batching: {self.messages_sent} messages in {now - self.last_report:.0f} s, average {fill:.0f}% of max_msg_size, {self.splits} oversize batches split')
+            self.messages_sent = 0
+            self.bytes_sent = 0
+            self.splits = 0
+            self.last_report = now
+
+class SpillFile:
+    """Append-only file of encoded queue messages waiting for the queue.
+
+    Each entry is a header (message length, record count) followed by the message. How far the
+    entries have been replayed is kept in a side file, so an acquirer restarted with messages
+    still in the file resumes where it left off. Once everything has been replayed the file is
+    emptied.
+    """
+    entry_header = struct.Struct('<II')
+
+    def __init__(self, path, max_bytes, logger):
+        self.path = path
+        self.offset_path = path + '.offset'
+        self.max_bytes = max_bytes
+        self.logger = logger
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(path, 'a+b')  # writes always append, reads seek to the replay offset
+        self.size = self.file.seek(0, os.SEEK_END)
+        self.offset = 0
+        try:
+            with open(self.offset_path) as f:
+                self.offset = min(int(f.read()), self.size)
+        except (OSError, ValueError):
+            pass
+        self.full_logged = False
+        if self.pending():
+            logger.warning(f'Spill file {path} holds {self.size - self.offset} bytes from a previous run, replaying them')
+
+    def pending(self):
+        return self.offset < self.size
+
+    def append(self, data, records):
+        """Add a message; returns False, dropping it, if the file has reached max_bytes."""
+        if self.size + self.entry_header.size + len(data) > self.max_bytes:
+            if not self.full_logged:
+                self.logger.error(f'Spill file {self.path} is full ({self.max_bytes} bytes), dropping measurements until the queue drains')
+                self.full_logged = True
+            return False
+        self.file.write(self.entry_header.pack(len(data), records))
+        self.file.write(data)
+        self.file.flush()
+        self.size += self.entry_header.size + len(data)
+        return True
+
+    def peek(self):
+        """Return (message, record count, entry size) of the oldest entry not yet replayed, or None if it is damaged."""
+        self.file.seek(self.offset)
+        header = self.file.read(self.entry_header.size)
+        if len(header) == self.entry_header.size:
+            length, records = self.entry_header.unpack(header)
+            data = self.file.read(length)
+            if len(data) == length:
+                return data, records, self.entry_header.size + length
+        return None
+
+    def advance(self, entry_size):
+        self.offset += entry_size
+        if self.offset >= self.size:
+            self.file.truncate(0)
+            self.size = self.offset = 0
+            self.full_logged = False
+            try:
+                os.remove(self.offset_path)
+            except FileNotFoundError:
+                pass
+        else:
+            with open(self.offset_path, 'w') as f:
+                f.write(str(self.offset))
+
+    def close(self):
+        self.file.close()
+
+    def discard(self):
+        # drop an entry cut short, e.g. by a crash while it was being written
+        self.logger.error(f'Spill file {self.path} has a damaged entry at byte {self.offset}, discarding the rest of the file')
+        self.advance(self.size - self.offset)
+
+class SpillingQueue:
+    """Non-blocking front for the measurement queue, so a stalled collector does not stall the acquirer.
+
+    A message that finds the queue full, or older messages still waiting, goes to a bounded
+    in-memory overflow deque and, once that is full, to an append-only spill file (when a spill
+    file is configured). A drain thread moves the waiting messages to the queue in order as it
+    frees up: the deque first, then the spill file. Without a spill file a full deque makes put()
+    block as the queue itself would.
+    """
+    def __init__(self, queue, overflow_msgs, spill, logger, stats, retry_secs=0.5):
+        self.queue = queue
+        self.max_overflow = overflow_msgs
+        self.spill = spill  # SpillFile or None
+        self.logger = logger
+        self.stats = stats
+        self.retry_secs = retry_secs
+        self.overflow = deque()  # (message, record count)
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='queue spill', daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """Stop the drain thread; messages still waiting in memory go to the queue if it has room, else to the spill file."""
+        with self.lock:
+            self.running = False
+            self.changed.notify_all()
+        self.thread.join()
+        with self.lock:
+            dropped = 0
+            while self.overflow:
+                item, records = self.overflow.popleft()
+                try:
+                    self.queue.put(item, block=False)
+                    continue
+                except Exception:
+                    pass
+                # behind the messages already spilled, so these replay out of order
+                if self.spill is not None and self.spill.append(QueueSerializer.dumps(item), records):
+                    self.stats.count('spilled_records', records)
+                else:
+                    self.stats.count('dropped_records', records)
+                    dropped += records
+            if dropped:
+                self.logger.error(f'Dropped {dropped} waiting records on close')
+            if self.spill is not None:
+                self.spill.close()
+
+    def spilling(self):
+        return self.spill is not None and self.spill.pending()
+
+    def put(self, item, block=True, timeout=None):
+        # block and timeout are accepted for compatibility with the queue; put() never raises queue.Full
+        if isinstance(item, EncodedMessage):
+            records = item.records
+        else:
+            records = len(item) if isinstance(item, list) else 1
+        with self.lock:
+            if not self.overflow and not self.spilling():
+                try:
+                    self.queue.put(item, block=False)
+                    return
+                except queue.Full:
+                    self.stats.count('queue_full')
+            if self.spilling() or len(self.overflow) >= self.max_overflow:
+                if self.spill is not None:
+                    if self.spill.append(QueueSerializer.dumps(item), records):
+                        self.stats.count('spilled_records', records)
+                    else:
+                        self.stats.count('dropped_records', records)
+                    self.changed.notify_all()
+                    return
+                while len(self.overflow) >= self.max_overflow:
+                    self.changed.wait()
+            self.overflow.append((item, records))
+            self.changed.notify_all()
+
+    def move_one(self):
+        """Move the oldest waiting message to the queue; returns False if the queue is full."""
+        if self.overflow:
+            item, records = self.overflow[0]
+            self.queue.put(item, block=False)
+            self.overflow.popleft()
+            return True
+        entry = self.spill.peek()
+        if entry is None:
+            self.spill.discard()
+            return True
+        data, records, entry_size = entry
+        self.queue.put(EncodedMessage(data, records), block=False)
+        self.spill.advance(entry_size)
+        self.stats.count('replayed_records', records)
+        if not self.spill.pending():
+            self.logger.info('Spill file replayed, queue caught up')
+        return True
+
+    def drop_one(self, error):
+        """Drop the oldest waiting message after the queue rejected it for a reason other than being full."""
+        if self.overflow:
+            item, records = self.overflow.popleft()
+        else:
+            entry = self.spill.peek()
+            if entry is None:
+                self.spill.discard()
+                return
+            data, records, entry_size = entry
+            self.spill.advance(entry_size)
+        self.stats.count('dropped_records', records)
+        self.logger.error(f'Dropped waiting message of {records} records, queue rejected it: {error}')
+
+    def run(self):
+        while True:
+            with self.lock:
+                while self.running and not self.overflow and not self.spilling():
+                    self.changed.wait()
+                if not self.running:
+                    return
+                try:
+                    moved = self.move_one()
+                except queue.Full:
+                    moved = False
+                except Exception as e:
+                    # only a full queue is worth retrying; anything else would block every later message
+                    try:
+                        self.drop_one(e)
+                        moved = True
+                    except Exception as e:
+                        self.logger.error(f'Error reading spill file: {e}')
+                        moved = False
+                self.changed.notify_all()
+            if not moved:
+                sleep(self.retry_secs)
+
+class AlarmRule:
+    """One compiled alarm rule: a predicate on a record plus its debounce/hysteresis state.
+
+    The alarm becomes active after trip_after consecutive tripping samples and inactive after
+    clear_after consecutive non-tripping samples. With hysteresis, a value_< or value_> alarm
+    that is active only clears once the value is hysteresis beyond the threshold. Records with
+    no value (or no string, for substr_is) count as not tripping.
+    """
+    def __init__(self, operator, rule):
+        self.operator = operator
+        threshold = rule['value']
+        hysteresis = rule.get('hysteresis', 0)
+        self.trip_after = rule.get('trip_after', 1)
+        self.clear_after = rule.get('clear_after', 1)
+        if operator == 'value_<':
+            self.trips = lambda record: record.get('value') is not None and record['value'] < threshold
+            self.holds = lambda record: record.get('value') is not None and record['value'] < threshold + hysteresis
+        elif operator == 'value_>':
+            self.trips = lambda record: record.get('value') is not None and record['value'] > threshold
+            self.holds = lambda record: record.get('value') is not None and record['value'] > threshold - hysteresis
+        elif operator == 'value_=':
+            self.trips = lambda record: record.get('value') is not None and record['value'] == threshold
+            self.holds = self.trips
+        elif operator == 'value_!=':
+            self.trips = lambda record: record.get('value') is not None and record['value'] != threshold
+            self.holds = self.trips
+        elif operator == 'substr_is':
+            begin = rule['substr_begin']
+            end = rule['substr_end']
+            self.trips = lambda record: bool(record.get('string')) and record['string'][begin:end] == threshold
+            self.holds = self.trips
+        else:
+            raise ValueError(f'unknown alarm operator {operator}')
+        # alarms are only read downstream, so every tripped record can share one dict
+        self.alarm = {
+            'alarm_level': rule['alarm_level'],
+            'alarm_type': rule['alarm_type'],
+            'alarm_message': rule['alarm_message'],
+            'data_impacted': bool(rule.get('impacts_data', True)),
+        }
+        self.active = False
+        self.count = 0  # consecutive samples disagreeing with the current state
+        self.raised_at = None  # for alarm events
+        self.reported_at = None
+
+    def update(self, record):
+        """Feed one record; returns True while the alarm is active."""
+        if self.active:
+            if self.holds(record):
+                self.count = 0
+            else:
+                self.count += 1
+                if self.count >= self.clear_after:
+                    self.active = False
+                    self.count = 0
+        else:
+            if self.trips(record):
+                self.count += 1
+                if self.count >= self.trip_after:
+                    self.active = True
+                    self.count = 0
+            else:
+                self.count = 0
+        return self.active
+
+class AlarmEngine:
+    """The acquirer's alarms config compiled into per-parameter AlarmRule lists.
+
+    In 'samples' mode every record taken while an alarm is active carries it. In 'events' mode
+    only the records where an alarm is raised or cleared carry it, marked with alarm_event
+    'raised' or 'cleared' (the latter with duration_secs), plus an 'active' heartbeat every
+    heartbeat_secs while it stays raised.
+    """
+    def __init__(self, alarms_config, logger, mode='samples', heartbeat_secs=None):
+        if mode not in ('samples', 'events'):
+            logger.error(f'Unknown alarm_mode {mode}, using samples')
+            mode = 'samples'
+        self.events = mode == 'events'
+        self.heartbeat = timedelta(seconds=heartbeat_secs) if heartbeat_secs else None
+        self.rules = {}
+        for parameter, rules in alarms_config.items():
+            compiled = []
+            for rule in rules or []:
+                for operator, settings in rule.items():
+                    try:
+                        compiled.append(AlarmRule(operator, settings))
+                    except Exception as e:
+                        logger.error(f'Invalid alarm rule {operator} for {parameter}: {e}')
+            if compiled:
+                self.rules[parameter] = compiled
+
+    def apply(self, records):
+        """Evaluate a batch of records in order, attaching 'alarms' to those with active alarms."""
+        rules_for = self.rules.get
+        for record in records:
+            rules = rules_for(record.get('parameter'))
+            if rules:
+                self.apply_rules(record, rules)
+        return records
+
+    def apply_rules(self, record, rules):
+        """Evaluate one record against its parameter's rules (from self.rules), for callers that have looked them up already."""
+        if self.events:
+            record_alarms = [event for event in (self.event(rule, record) for rule in rules) if event]
+        else:
+            record_alarms = [rule.alarm for rule in rules if rule.update(record)]
+        if record_alarms:
+            record['alarms'] = record_alarms
+        return record
+
+    def event(self, rule, record):
+        """Update rule with record and return the alarm event it causes, if any."""
+        was_active = rule.active
+        active = rule.update(record)
+        if not (active or was_active):
+            return None
+        now = record.get('sample_time') or datetime.now()
+        if active and not was_active:
+            rule.raised_at = rule.reported_at = now
+            return dict(rule.alarm, alarm_event='raised')
+        duration_secs = (now - rule.raised_at).total_seconds()
+        if was_active and not active:
+            return dict(rule.alarm, alarm_event='cleared', duration_secs=duration_secs)
+        if self.heartbeat and now - rule.reported_at >= self.heartbeat:
+            rule.reported_at = now
+            return dict(rule.alarm, alarm_event='active', duration_secs=duration_secs)
+        return None
+
+class LatencyHistogram:
+    """Counts of observed values in fixed buckets (bounds are the bucket upper edges), plus count, sum and max.
+
+    Percentiles are read off the buckets, so they are only as fine as the bounds.
+    """
+    # seconds, roughly three buckets per decade from 1 us to 100 s
+    default_bounds = (1e-6, 3e-6, 1e-5, 3e-5, 1e-4, 3e-4, 1e-3, 3e-3, 0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100)
+
+    def __init__(self, bounds=default_bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket holds everything above the last bound
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (the max for the overflow bucket)."""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'bounds': list(self.bounds),
+            'counts': list(self.counts),
+        }
+
+class AcquirerStats:
+    """Hot-path counters and latency histograms of one acquirer.
+
+    They cover the acquirer's whole life and are written every write_secs as a JSON file named
+    after the instrument in the stats directory (by default in /dev/shm, so in memory), which
+    `vandaq_admin stats` reads. Updates are not locked: a count lost to a race between the
+    acquirer and batcher threads does not matter for monitoring.
+    """
+    counter_names = ('lines_read', 'messages_received', 'records_sent', 'parse_errors', 'queue_full', 'serial_reopens',
+                     'spilled_records', 'replayed_records', 'dropped_records')
+    histogram_names = ('parse_secs', 'alarm_secs', 'queue_put_secs', 'lag_secs')
+    # acquisition minus instrument time; negative when the instrument clock runs ahead
+    lag_bounds = (-3600, -60, -10, -2, -1, -0.5, 0, 0.5, 1, 2, 5, 10, 30, 60, 300, 3600)
+
+    def __init__(self, config, logger):
+        stats_config = config.get('stats') or {}
+        self.instrument = config['instrument']
+        self.platform = config['platform']
+        self.logger = logger
+        self.enabled = stats_config.get('enabled', True)
+        self.directory = stats_config.get('dir', '/dev/shm/vandaq_stats')
+        self.write_secs = stats_config.get('write_secs', 10)
+        self.path = os.path.join(self.directory, file_safe_name(self.instrument) + '.json')
+        self.counters = dict.fromkeys(self.counter_names, 0)
+        self.histograms = {name: LatencyHistogram() for name in self.histogram_names}
+        self.histograms['lag_secs'] = LatencyHistogram(self.lag_bounds)
+        self.started = datetime.now()
+        self.last_write = perf_counter()
+        self.write_error_logged = False
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        self.histograms[name].observe(value)
+
+    def observe_lag(self, records):
+        # the records of one reading share their times, so the first one with an instrument time will do
+        for record in records:
+            instrument_time = record.get('instrument_time')
+            if instrument_time is not None:
+                if instrument_time.year != 1900:  # time-of-day-only clocks have no date to compare
+                    acquisition_time = record.get('acquisition_time')
+                    if acquisition_time is not None:
+                        self.observe('lag_secs', (acquisition_time - instrument_time).total_seconds())
+                return
+
+    def as_dict(self):
+        return {
+            'platform': self.platform,
+            'instrument': self.instrument,
+            'pid': os.getpid(),
+            'started': self.started.isoformat(timespec='seconds'),
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'counters': dict(self.counters),
+            'histograms': {name: h.as_dict() for name, h in self.histograms.items()},
+        }
+
+    def maybe_write(self):
+        if self.enabled and perf_counter() - self.last_write >= self.write_secs:
+            self.write()
+
+    def write(self):
+        self.last_write = perf_counter()
+        # write a temporary file and rename it, so readers never see a partial file
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(self.as_dict(), f)
+            os.replace(tmp_path, self.path)
+            self.write_error_logged = False
+        except Exception as e:
+            if not self.write_error_logged:
+                self.logger.error(f'Error writing stats file {self.path}: {e}')
+                self.write_error_logged = True
+
+def put_counting_full(q, item, stats):
+    """Put item on q, blocking if it is full, and count the puts that found it full."""
+    start = perf_counter()
+    try:
+        q.put(item, block=False)
+    except queue.Full:
+        stats.count('queue_full')
+        q.put(item)
+    stats.observe('queue_put_secs', perf_counter() - start)
 
 class Acquirer:
     global logger
@@ -271,13 +1505,20 @@ class Acquirer:
         self.config = config_dict
         self.logger = logging.getLogger(self.config['logs']['logger_name'])
         logger = self.logger
-        self.rp = RecordParser(config_dict, logger)
+        self.stats = AcquirerStats(config_dict, self.logger)
+        self.rp = RecordParser(config_dict, logger, self.stats)
+        self.alarm_engine = None
+        if self.config.get('alarms'):
+            self.alarm_engine = AlarmEngine(self.config['alarms'], self.logger,
+                self.config.get('alarm_mode', 'samples'), self.config.get('alarm_heartbeat_secs'))
         # Initialize static variables for the 'random' signal
         self.sim_previous_value = 0
         self.sim_direction = 1
         self.command_queue = None
         self.response_queue = None
         self.response_queue_max_msgs = None
+        self.batcher = None
+        self.encode_message = None
         try:
             if self.config['verbose'] > 0:
                 self.verbose = True
@@ -292,7 +1533,19 @@ class Acquirer:
             myMaxMsgSize = self.config['queue']['max_msg_size']
             myMaxMsgs = self.config['queue']['max_msgs']
             myQname = self.config['queue']['name']
-            self.queue = self.open_queue(myQname, myMaxMsgs, myMaxMsgSize)
+            if myQname in shared_queues:
+                # running in vandaq_acquirer_host.py, which owns the queue
+                self.queue = shared_queues[myQname]
+            else:
+                self.queue = self.open_queue(myQname, myMaxMsgs, myMaxMsgSize)
+            if self.config['queue'].get('wire_format', 'pickle') == 'binary':
+                load_drivers(['wire'])
+                self.encode_message = wire_message
+            if self.queue:
+                self.queue = self.make_spilling_queue(self.queue, self.config['queue'])
+            batch_latency_secs = self.config['queue'].get('batch_latency_secs')
+            if batch_latency_secs and self.queue:
+                self.batcher = QueueBatcher(self.queue, myMaxMsgSize, batch_latency_secs, self.logger, self.encode_message or pickle_message, stats=self.stats)
         command_queue_config = self.config.get('command_queue')
         if command_queue_config:
             self.command_queue = self.open_queue(
@@ -312,40 +1565,36 @@ class Acquirer:
             self.response_queue_max_msgs = response_queue_config['max_msgs']
 
     def open_queue(self, qname, maxmsgs, maxmsgsize, destroy_first=False):
-        qExists = False
-        queue = None
-        # check if queue already exists
-        try:
-            queue = posixmq.Queue(qname)
-            qExists = True
-        except (OSError, posixmq.QueueError) as e:
-            self.logger.debug(f'Queue {qname} does not yet exist: {e}')
-        if qExists:
-            if destroy_first:
-                queue.close()
-                queue.unlink()
-                qExists = False
-            else:
-                attribs = queue.qattr()
-                # if queue exists, check to make sure it is big enough
-                if attribs['max_size'] < maxmsgs or attribs['max_msgbytes'] < maxmsgsize:
-                    # destroy the queue if it is too small
-                    queue.close()
-                    queue.unlink()
-                    qExists = False
-        if not qExists:
-            # create the queue if it doesn't exist or has been detroyed
+        return open_posix_queue(qname, maxmsgs, maxmsgsize, self.logger, destroy_first)
+
+    def make_spilling_queue(self, queue, queue_config):
+        spill = None
+        path = None
+        if queue_config.get('spill_dir'):
+            path = os.path.join(queue_config['spill_dir'], file_safe_name(self.config['instrument']) + '.spill')
+            previous = spilling_queues.pop(path, None)
+            if previous:
+                # left behind by an acquirer that failed before it could be closed
+                previous.close()
             try:
-                queue = posixmq.Queue(qname, maxsize=maxmsgs, maxmsgsize=maxmsgsize)
-            except (OSError, posixmq.QueueError) as e:
-                self.logger.error(f'Queue {qname} failure to create: {e}')
-            else:
-                # Change permissions to rw-rw-rw-
-                try:
-                    os.chmod(f'/dev/mqueue{qname}', 0o666)
-                except Exception as e:
-                    self.logger.error(f'Failed to change permissions for queue {qname}: {e}')
-        return queue
+                spill = SpillFile(path, queue_config.get('spill_max_mb', 1024) * 2**20, self.logger)
+            except OSError as e:
+                self.logger.error(f'Cannot open spill file {path}, measurements will wait in memory only: {e}')
+        spilling_queue = SpillingQueue(queue, queue_config.get('overflow_msgs', 1000), spill, self.logger, self.stats,
+                                       queue_config.get('spill_retry_secs', 0.5))
+        if spill is not None:
+            spilling_queues[path] = spilling_queue
+        return spilling_queue
+
+    def close(self):
+        """Stop the batcher and spill threads, so the acquirer can be rebuilt in the same process."""
+        if self.batcher:
+            self.batcher.close()
+        if isinstance(self.queue, SpillingQueue):
+            self.queue.close()
+            spill = self.queue.spill
+            if spill is not None and spilling_queues.get(spill.path) is self.queue:
+                del spilling_queues[spill.path]
 
     def get_command_from_queue(self):
         command = None
@@ -381,7 +1630,22 @@ class Acquirer:
         if measurements and len(measurements) > 0:
             if doqueue:
                 #self.logger.debug('queuing %s', str(measurements))
-                self.queue.put(measurements)
+                if isinstance(measurements, dict) and (self.batcher or self.encode_message):
+                    # a lone record (e.g. a wholeDict message); batches and encoded messages are lists
+                    measurements = [measurements]
+                if isinstance(measurements, dict):
+                    self.stats.count('records_sent')
+                    self.stats.observe_lag([measurements])
+                else:
+                    self.stats.count('records_sent', len(measurements))
+                    self.stats.observe_lag(measurements)
+                if self.batcher:
+                    self.batcher.send(measurements)
+                elif self.encode_message:
+                    put_counting_full(self.queue, self.encode_message(measurements), self.stats)
+                else:
+                    put_counting_full(self.queue, measurements, self.stats)
+                self.stats.maybe_write()
                 if self.verbose:
                     print(str(measurements))
             else:
@@ -389,51 +1653,25 @@ class Acquirer:
         
     def parse_simple_string_to_record(self, line, config_dict=None, item_delimiter=','):
         self.logger.debug('received data string: '+line)
-        return self.rp.parse_simple_string_to_record(line, config_dict, item_delimiter)
+        start = perf_counter()
+        records = self.rp.parse_simple_string_to_record(line, config_dict, item_delimiter)
+        self.stats.observe('parse_secs', perf_counter() - start)
+        return records
+
+    def parse_values_to_record(self, values, config_dict):
+        start = perf_counter()
+        records = self.rp.parse_values_to_record(values, config_dict)
+        self.stats.observe('parse_secs', perf_counter() - start)
+        return records
 
     def apply_alarms(self, messages_in):
-        if messages_in and 'alarms' in self.config:
-            alarms = self.config['alarms']
-            messages_out = []
-            for message in messages_in:
-                if message['parameter'] in alarms:
-                    message_alarms = []
-                    for alarm_rule in alarms[message['parameter']]:
-                        for alarm_key in alarm_rule.keys():
-                            alarm = {} 
-                            alarm_tripped = False                           
-                            if alarm_key == 'value_<':
-                                if message['value'] < alarm_rule[alarm_key]['value']:
-                                    alarm_tripped = True
-                            if alarm_key == 'value_>':
-                                if message['value'] > alarm_rule[alarm_key]['value']:
-                                    alarm_tripped = True
-                            if alarm_key == 'value_=':
-                                if message['value'] == alarm_rule[alarm_key]['value']:
-                                    alarm_tripped = True
-                            if alarm_key == 'value_!=':
-                                if message['value'] != alarm_rule[alarm_key]['value']:
-                                    alarm_tripped = True
-                            if alarm_key == 'substr_is':
-                                if 'string' in message and message['string']:
-                                    substr = message['string'][alarm_rule[alarm_key]['substr_begin']:alarm_rule[alarm_key]['substr_end']]
-                                    if substr == alarm_rule[alarm_key]['value']:
-                                        alarm_tripped = True
-                            if alarm_tripped:
-                                alarm = {'alarm_level': alarm_rule[alarm_key]['alarm_level'], 'alarm_type': alarm_rule[alarm_key]['alarm_type'], 'alarm_message':alarm_rule[alarm_key]['alarm_message']}
-                                if 'impacts_data' in alarm_rule[alarm_key] and not alarm_rule[alarm_key]['impacts_data']:
-                                    alarm['data_impacted'] = False
-                                else:
-                                    alarm['data_impacted'] = True
-                                message_alarms.append(alarm)
-                                
-                    if message_alarms:
-                        message['alarms'] = message_alarms
-                messages_out.append(message)
-        else:
-            messages_out = messages_in
-        return messages_out        
-  
+        if messages_in and self.alarm_engine:
+            start = perf_counter()
+            messages_out = self.alarm_engine.apply(messages_in)
+            self.stats.observe('alarm_secs', perf_counter() - start)
+            return messages_out
+        return messages_in
+
     def time(self):
         # Called to give some processing time to the acquirer
         # meant to be used in polled or periodic instrument reads
@@ -456,8 +1694,10 @@ class SerialStreamAcquirer(Acquirer):
         self.num_items_per_line = 0
         self.serial_open = False
         self.serial_open_error_logged = False
-        self.line_buffer = []
+        self.line_buffer = deque()
         self.partial_line = ""
+        self.serial_selector = None
+        self.selected_port = None
         if 'stream' in self.config:
             if 'items' in self.config['stream']:
                 try:
@@ -473,20 +1713,20 @@ class SerialStreamAcquirer(Acquirer):
     def check_serial_open(self):
         if not self.serial_open:
             try:
+                reopening = self.serial_port is not None
                 self.serial_port = serial.Serial(self.config['serial']['device'],baudrate=self.config['serial']['baud'])    
                 self.serial_open = True
+                if reopening:
+                    self.stats.count('serial_reopens')
                 self.serial_open_error_logged = False
             except serial.SerialException as e:
                 if not self.serial_open_error_logged:
                     self.logger.error('Error opening serial port '+self.config['serial']['device']+' :'+ str(e))
                     self.serial_open_error_logged = True
         return self.serial_open
-               
-    def getline(self):
-        """Retrieve the next complete line, keeping incomplete lines in a buffer."""
-        self.check_serial_open()
 
-        # Read available bytes from the serial buffer
+    def read_serial_lines(self):
+        """Move the bytes waiting on the serial port into the line buffer, keeping any incomplete line."""
         if self.serial_port.in_waiting > 0:
             data = self.serial_port.read(self.serial_port.in_waiting).decode(errors='replace')
             self.logger.debug('Received partial data: ' + data)
@@ -496,17 +1736,70 @@ class SerialStreamAcquirer(Acquirer):
             # Split into complete lines and update the buffer
             lines = self.partial_line.split('\n')
             self.line_buffer.extend(line.strip() for line in lines[:-1])
+            self.stats.count('lines_read', len(lines) - 1)
             self.partial_line = lines[-1]  # Store incomplete line
 
+    def getline(self):
+        """Retrieve the next complete line, keeping incomplete lines in a buffer."""
+        self.check_serial_open()
+
+        # Read available bytes from the serial buffer
+        self.read_serial_lines()
+
         # Return the oldest line from the buffer if available
         if self.line_buffer:
-            return self.line_buffer.pop(0)
+            return self.line_buffer.popleft()
 
         return None  # No complete line available
-                
+
+    def wait_for_serial_data(self, timeout):
+        """Block until the serial port has bytes waiting or timeout seconds have passed."""
+        if self.selected_port is not self.serial_port:
+            # (re)register after the port has been opened
+            if self.serial_selector is None:
+                self.serial_selector = selectors.DefaultSelector()
+            else:
+                for key in list(self.serial_selector.get_map().values()):
+                    self.serial_selector.unregister(key.fileobj)
+            self.serial_selector.register(self.serial_port.fileno(), selectors.EVENT_READ)
+            self.selected_port = self.serial_port
+        if self.serial_port.in_waiting > 0:
+            return True
+        return bool(self.serial_selector.select(timeout))
+
+    def process_stream_line(self, line):
+        """Route one complete line: instrument responses to the response queue, data lines to the measurement queue."""
+        if self.config.get('response_header'):
+            header = self.config['response_header']
+            if line and line[0:len(header)] == header:
+                self.logger.info('Received response from instrument: '+line.strip()) 
+                response = {'response': line}
+                self.put_response_to_queue(response)
+                return
+        if line and len(line.split(self.config['stream']['item_delimiter'])) == self.num_items_per_line:
+            dataMessage = self.parse_simple_string_to_record(line,config_dict=self.config['stream'])
+            dataMessage = self.apply_alarms(dataMessage)
+            if dataMessage and len(dataMessage) > 0:
+                self.logger.debug('Sending message to queue: ' + str(dataMessage))
+                self.send_measurement_to_queue(dataMessage)
+
+    def process_command_queue(self):
+        """Write any command waiting in the command queue to the instrument."""
+        if self.command_queue:
+            command = self.get_command_from_queue()
+            if command:
+                self.logger.info('Received command from queue: '+ str(command))
+                if 'command' in command:
+                    try:
+                        self.serial_port.write(str.encode(command['command']))
+                    except Exception as e:
+                        self.logger.error('Error writing to serial port '+self.config['serial']['device']+' :'+ str(e))
+
     def run(self):
+        if self.config['stream'].get('read_mode') == 'event':
+            self.run_event_driven()
+            return
         cycle_time = self.config['stream'].get('cycle_time',1)
-        command = None
         while True:
             if self.check_serial_open():
                 try:
@@ -518,31 +1811,30 @@ class SerialStreamAcquirer(Acquirer):
                     self.logger.error('Error reading serial port '+self.config['serial']['device']+' :'+ str(e))
                     sleep(cycle_time)
                 else:
-                    if self.config.get('response_header'):
-                        header = self.config['response_header']
-                        if line and line[0:len(header)] == header:
-                            self.logger.info('Received response from instrument: '+line.strip()) 
-                            response = {'response': line}
-                            self.put_response_to_queue(response)
-                            continue
-                    if line and len(line.split(self.config['stream']['item_delimiter'])) == self.num_items_per_line:
-                        #print(str(line))
-                        command = None
-                        dataMessage = self.parse_simple_string_to_record(line,config_dict=self.config['stream'])
-                        dataMessage = self.apply_alarms(dataMessage)
-                        if dataMessage and len(dataMessage) > 0:
-                            #print(str(dataMessage))
-                            self.logger.debug('Sending message to queue: ' + str(dataMessage))
-                            self.send_measurement_to_queue(dataMessage)
-                if self.command_queue:
-                    command = self.get_command_from_queue()
-                    if command:
-                        self.logger.info('Received command from queue: '+ str(command))
-                        if 'command' in command:
-                            try:
-                                self.serial_port.write(str.encode(command['command']))
-                            except Exception as e:
-                                self.logger.error('Error writing to serial port '+self.config['serial']['device']+' :'+ str(e))
+                    self.process_stream_line(line)
+                self.process_command_queue()
+            else:
+                sleep(cycle_time)
+
+    def run_event_driven(self):
+        # Wake as soon as the port has data and drain every complete line,
+        # checking the command queue at least every command_check_secs
+        cycle_time = self.config['stream'].get('cycle_time',1)
+        command_check_secs = self.config['stream'].get('command_check_secs', 0.5)
+        while True:
+            if self.check_serial_open():
+                try:
+                    if self.wait_for_serial_data(command_check_secs):
+                        self.read_serial_lines()
+                except Exception as e:
+                    self.logger.error('Error reading serial port '+self.config['serial']['device']+' :'+ str(e))
+                    sleep(cycle_time)
+                else:
+                    while self.line_buffer:
+                        line = self.line_buffer.popleft()
+                        self.logger.debug('Simple serial received line: ' + str(line))
+                        self.process_stream_line(line)
+                self.process_command_queue()
             else:
                 sleep(cycle_time)
 
@@ -552,6 +1844,9 @@ class SerialPolledAcquirer(SerialStreamAcquirer):
         self.lastPolled =datetime.now()
         
     def run(self):
+        if self.config.get('poll_mode') == 'scheduled':
+            self.run_scheduled()
+            return
         while True:
             # Check if enough time has passed since the last poll
             if (datetime.now() - self.lastPolled).total_seconds() >= self.config['data_freq_secs']:
@@ -578,77 +1873,197 @@ class SerialPolledAcquirer(SerialStreamAcquirer):
                                     timeout = True
                                     read = False
 
-                            resp_string = ''
                             if read:
                                 sleep(.01)
                                 # Read all available bytes from serial and decode
                                 original_resp_string = self.serial_port.read_all().decode()
-                                self.logger.debug('Received from poll: ' + original_resp_string)
-                                try:
-                                    resp_string = original_resp_string
-                                    # Optionally trim response string according to config
-                                    if 'trim_response_begin' in self.config['poll'][key]:
-                                        if 'trim_response_end' in self.config['poll'][key]:
-                                            resp_string = resp_string[self.config['poll'][key]['trim_response_begin']:self.config['poll'][key]['trim_response_end']]
-                                        else:
-                                            resp_string = resp_string[self.config['poll'][key]['trim_response_begin']:]
-                                    else:
-                                        if 'trim_response_end' in self.config['poll'][key]:
-                                            resp_string = resp_string[:self.config['poll'][key]['trim_response_end']]
-
-                                    # Split response into items
-                                    responses = resp_string.split(self.config['poll'][key]['item_delimiter'])
-
-                                    value_string = ''
-                                    # If key_delimiter is specified, parse key-value pairs
-                                    if 'key_delimiter' in self.config['poll'][key]:
-                                        resp_values = {}
-                                        for response in responses:
-                                            parts = response.split(self.config['poll'][key]['key_delimiter'])
-                                            resp_values[parts[0]] = parts[1]
-                                        value_string = self.config['poll'][key]['item_delimiter'].join(resp_values.values())
-                                    else:
-                                        value_string = self.config['poll'][key]['item_delimiter'].join(responses)
-
-                                    # Parse the value string into messages and send to queue
-                                    if value_string:
-                                        messages = self.parse_simple_string_to_record(value_string, config_dict=self.config['poll'][key])
-                                        messages = self.apply_alarms(messages)
-                                        self.send_measurement_to_queue(messages)
-                                except Exception as e:
-                                    self.logger.error('cannot proccess response string: ' + original_resp_string + ' :' + str(e))
-                    # Check for commands in the command queue
-                    if self.command_queue:
-                        command = self.get_command_from_queue()
-                        if command:
-                            self.logger.info('Received command from queue: '+ str(command))
-                            if 'command' in command:
-                                try:
-                                    self.serial_port.write(str.encode(command['command']))
-                                except Exception as e:
-                                    self.logger.error('Error writing to serial port '+self.config['serial']['device']+' :'+ str(e))
-                                    continue
-                                else:
-                                    sleep(self.config.get('wait_for_response_secs',0.5))
-                                    line = self.serial_port.read_all().decode()
-                                    if line:
-                                        self.logger.debug('Simple serial received line: ' + str(line))
-                                    if self.config.get('response_header'):
-                                        header = self.config['response_header']
-                                        if line and line[0:len(header)] == header:
-                                            self.logger.info('Received response from instrument: '+line.strip()) 
-                                            response = {'response': line}
-                                            self.put_response_to_queue(response)
-                                            continue
+                                self.process_poll_response(self.config['poll'][key], original_resp_string)
+                    self.process_poll_command()
+
+    def process_poll_response(self, poll, original_resp_string):
+        """Parse the response to one poll request and send its measurements to the queue."""
+        self.logger.debug('Received from poll: ' + original_resp_string)
+        try:
+            resp_string = original_resp_string
+            # Optionally trim response string according to config
+            if 'trim_response_begin' in poll:
+                if 'trim_response_end' in poll:
+                    resp_string = resp_string[poll['trim_response_begin']:poll['trim_response_end']]
+                else:
+                    resp_string = resp_string[poll['trim_response_begin']:]
+            else:
+                if 'trim_response_end' in poll:
+                    resp_string = resp_string[:poll['trim_response_end']]
+
+            # Split response into items
+            responses = resp_string.split(poll['item_delimiter'])
+
+            value_string = ''
+            # If key_delimiter is specified, parse key-value pairs
+            if 'key_delimiter' in poll:
+                resp_values = {}
+                for response in responses:
+                    parts = response.split(poll['key_delimiter'])
+                    resp_values[parts[0]] = parts[1]
+                value_string = poll['item_delimiter'].join(resp_values.values())
+            else:
+                value_string = poll['item_delimiter'].join(responses)
+
+            # Parse the value string into messages and send to queue
+            if value_string:
+                messages = self.parse_simple_string_to_record(value_string, config_dict=poll)
+                messages = self.apply_alarms(messages)
+                self.send_measurement_to_queue(messages)
+        except Exception as e:
+            self.logger.error('cannot proccess response string: ' + original_resp_string + ' :' + str(e))
+
+    def process_poll_command(self):
+        # Check for commands in the command queue
+        if self.command_queue:
+            command = self.get_command_from_queue()
+            if command:
+                self.logger.info('Received command from queue: '+ str(command))
+                if 'command' in command:
+                    try:
+                        self.serial_port.write(str.encode(command['command']))
+                    except Exception as e:
+                        self.logger.error('Error writing to serial port '+self.config['serial']['device']+' :'+ str(e))
+                        return
+                    else:
+                        sleep(self.config.get('wait_for_response_secs',0.5))
+                        line = self.serial_port.read_all().decode()
+                        if line:
+                            self.logger.debug('Simple serial received line: ' + str(line))
+                        if self.config.get('response_header'):
+                            header = self.config['response_header']
+                            if line and line[0:len(header)] == header:
+                                self.logger.info('Received response from instrument: '+line.strip()) 
+                                response = {'response': line}
+                                self.put_response_to_queue(response)
+
+    def read_poll_response(self, poll):
+        """Read the response to a poll request just sent.
+
+        The response is complete when it contains the terminator (response_terminator, or the
+        poll's line_delimiter) and is at least response_len_min long; without a terminator, when
+        it reaches response_len_max, or reaches response_len_min and the line goes quiet for
+        response_gap_secs. Returns None on timeout.
+        """
+        terminator = (poll.get('response_terminator') or poll.get('line_delimiter') or '').encode()
+        len_min = poll.get('response_len_min', 1)
+        len_max = poll.get('response_len_max')
+        gap_secs = poll.get('response_gap_secs', 0.02)
+        deadline = perf_counter() + poll.get('response_timeout_secs', 1)
+        response = bytearray()
+        while True:
+            remaining = deadline - perf_counter()
+            if remaining <= 0:
+                return None
+            quiet_secs = gap_secs if (not terminator and len(response) >= len_min) else remaining
+            if not self.wait_for_serial_data(min(quiet_secs, remaining)):
+                if not terminator and len(response) >= len_min:
+                    break
+                continue
+            response += self.serial_port.read(self.serial_port.in_waiting or 1)
+            if len(response) < len_min:
+                continue
+            if terminator:
+                if terminator in response:
+                    break
+            elif len_max and len(response) >= len_max:
+                break
+        self.stats.count('lines_read')
+        return response.decode()
+
+    def run_scheduled(self):
+        # Each poll entry is sent every period_secs (default data_freq_secs). Polls are sent
+        # back to back as they come due and each response is read only until it is complete.
+        # A poll whose slot has already passed when it gets its turn counts as a missed
+        # deadline and resumes at its next slot. Achieved rates are logged every poll_report_secs.
+        polls = self.config.get('poll') or {}
+        report_secs = self.config.get('poll_report_secs', 60)
+        command_check_secs = self.config.get('command_check_secs', 0.5)
+        period = {key: polls[key].get('period_secs', self.config['data_freq_secs']) for key in polls}
+        start = perf_counter()
+        next_due = {key: start for key in polls}
+        completed = {key: 0 for key in polls}
+        timeouts = {key: 0 for key in polls}
+        missed = {key: 0 for key in polls}
+        last_report = start
+        while True:
+            if not self.check_serial_open():
+                sleep(self.config['data_freq_secs'])
+                continue
+            if not polls:
+                self.process_poll_command()
+                sleep(command_check_secs)
+                continue
+            key = min(next_due, key=next_due.get)
+            now = perf_counter()
+            if next_due[key] > now:
+                self.process_poll_command()
+                wait_secs = next_due[key] - perf_counter()
+                if wait_secs > 0:
+                    sleep(min(wait_secs, command_check_secs))
+                continue
+            late_slots = int((now - next_due[key]) // period[key])
+            if late_slots:
+                missed[key] += late_slots
+            next_due[key] += (late_slots + 1) * period[key]
+            poll = polls[key]
+            try:
+                self.serial_port.reset_input_buffer()
+                self.serial_port.write(str.encode(poll['request_string']))
+                response = self.read_poll_response(poll)
+            except Exception as e:
+                # reopen the port on the next pass
+                self.logger.error('Error polling serial port '+self.config['serial']['device']+' :'+ str(e))
+                try:
+                    self.serial_port.close()
+                except Exception:
+                    pass
+                self.serial_open = False
+                sleep(self.config['data_freq_secs'])
+                continue
+            if response is None:
+                timeouts[key] += 1
+                self.logger.debug('Timed out- no response to: ' + poll['request_string'])
+            else:
+                completed[key] += 1
+                self.process_poll_response(poll, response)
+            now = perf_counter()
+            if now - last_report >= report_secs:
+                elapsed = now - last_report
+                for k in polls:
+                    self.logger.info(f'Poll {k}: {completed[k] / elapsed:.2f} Hz achieved (target {1 / period[k]:.2f} Hz), '
+                                     f'{timeouts[k]} timeouts, {missed[k]} missed deadlines')
+                    completed[k] = timeouts[k] = missed[k] = 0
+                last_report = now
 
 
 class NetworkAcquirer(Acquirer):
+    codecs = ('pickle', 'msgpack')
+
     def __init__(self, configdict):
+        # how the sender encodes its messages; pickle is kept as the default for existing senders.
+        # Checked before the queues and threads are set up, as a typo cannot be guessed around
+        codec = configdict['network'].get('codec', 'pickle')
+        if codec not in self.codecs:
+            raise ValueError(f"unknown network codec {codec!r}, expected one of {', '.join(self.codecs)}")
         Acquirer.__init__(self, configdict)
         self.socket = None
         self.socket_open = False
+        self.poller = None
         self.conn = None
         self.addr = None
+        network = self.config['network']
+        self.receive_timeout_ms = int(1000 * network.get('receive_timeout_secs', 1))
+        self.codec = codec
+        if self.codec == 'msgpack':
+            load_drivers(['msgpack'])
+        # bounds on what one message may hold, so decoding a message takes bounded time and memory
+        self.max_message_bytes = int(network.get('max_message_bytes', 4 * 1024 * 1024))
+        self.max_message_items = int(network.get('max_message_items', 100000))
 
     def check_socket_open(self):
         host = self.config['network']['address']
@@ -658,39 +2073,79 @@ class NetworkAcquirer(Acquirer):
             context = zmq.Context()
             self.socket = context.socket(zmq.PULL)  # response socket
             try:
+                # zmq drops larger messages (and the connection sending them) before they reach us
+                self.socket.setsockopt(zmq.MAXMSGSIZE, self.max_message_bytes)
                 self.socket.bind('tcp://*:'+str(port))
                 self.socket_open = True
+                self.poller = zmq.Poller()
+                self.poller.register(self.socket, zmq.POLLIN)
             except Exception as e:
                 self.socket_open = False
         return self.socket_open
 
+    def decode_message(self, buffer):
+        if self.codec == 'msgpack':
+            # msgpack only builds plain containers and scalars; binary and extension types
+            # are refused outright and every container is size limited
+            return msgpack.unpackb(buffer, raw=False, strict_map_key=False, max_str_len=self.max_message_bytes,
+                                   max_bin_len=0, max_ext_len=0, max_array_len=self.max_message_items,
+                                   max_map_len=self.max_message_items)
+        return pickle.loads(buffer)
+
+    def check_message(self, message):
+        # a message must be a dict of named dicts holding numbers or strings keyed by numbers or strings
+        if not isinstance(message, dict):
+            raise ValueError(f'message is a {type(message).__name__}, not a dict')
+        for name, values_dict in message.items():
+            if not isinstance(name, str):
+                raise ValueError(f'dictionary name {name!r} is not a string')
+            if not isinstance(values_dict, dict):
+                raise ValueError(f'dictionary {name} is a {type(values_dict).__name__}, not a dict')
+            for key, value in values_dict.items():
+                if not isinstance(key, (str, int, float)):
+                    raise ValueError(f'dictionary {name} has a key of type {type(key).__name__}')
+                if value is not None and not isinstance(value, (str, int, float)):
+                    raise ValueError(f'dictionary {name} has a {type(value).__name__} value for {key!r}')
+
     def read_message_from_socket(self):
+        # Returns the next decoded message, or None if none arrives within receive_timeout_secs
         message = None
-        # Receive data from the client
-        success = False
-        while  not success:
-            received_data = b''
-            if self.check_socket_open():
+        if self.check_socket_open():
+            try:
+                if not self.poller.poll(self.receive_timeout_ms):
+                    return None
+                # decode straight from the zmq frame rather than copying it into bytes first
+                frame = self.socket.recv(copy=False)
+            except Exception as e:
+                self.logger.error('Error receiving message from zmq socket,'+' err:' + str(e))
+            else:
                 try:
-                    received_data = self.socket.recv()    
+                    message_length = len(frame)
+                    self.stats.count('messages_received')
+                    message = self.decode_message(frame.buffer)
+                    self.check_message(message)
+                    self.logger.debug(self.codec + ' message of length = '+ str(message_length))
                 except Exception as e:
-                    self.logger.error('Error receiving message from zmq socket,'+' err:' + str(e))
-                else:
-                    try:
-                        message_length = 0
-                        message = pickle.loads(received_data)
-                        message_length = len(message)
-                        self.logger.debug('pickled message of length = '+ str(message_length))
-                        success = True
-                    except Exception as e:
-                        self.logger.error('Error converting message from socket, message len='+str(message_length)+' err:' + str(e))
-                        message = None
-                        success = True
+                    self.logger.error('Error converting message from socket, message len='+str(message_length)+' err:' + str(e))
+                    self.stats.count('parse_errors')
+                    message = None
         return message
 
 class NetworkStreamingAcquirer(NetworkAcquirer):
     def __init__(self, configdict):
         NetworkAcquirer.__init__(self, configdict)
+        self.direct_values = self.config['network'].get('direct_values', False)
+        self.dictionaries = self.config['dictionaries'].split(',')
+        # the dict keys to take values from, for each dictionary
+        self.value_keys = {}
+        for dict in self.dictionaries:
+            if 'keys' in self.config[dict]:
+                keys = self.config[dict]['keys']
+                self.value_keys[dict] = list(map(int,keys.split(','))) if isinstance(keys, str) else keys
+            elif 'items' in self.config[dict]:
+                self.value_keys[dict] = self.config[dict]['items'].split(',')
+            else:
+                self.value_keys[dict] = []  # wholeDict only
 
     def measurement_dict_to_text_line(self, dict, keys):
         if isinstance(keys, str):
@@ -702,6 +2157,44 @@ class NetworkStreamingAcquirer(NetworkAcquirer):
             self.logger.error('Error converting measurement dict to string, err:' + str(e))
             return None
 
+    def process_values_dict(self, dict, values_dict):
+        # direct_values: hand the values to the parser as they are, without a text round trip
+        try:
+            values = [values_dict[k] for k in self.value_keys[dict]]
+        except Exception as e:
+            self.logger.error('bad message found while acquiring: {}, err: {}'.format(str(dict), str(e)))
+            values = None
+        if values:
+            dataMessage = self.parse_values_to_record(values, self.config[dict])
+            dataMessage = self.apply_alarms(dataMessage)
+            if dataMessage:
+                self.send_measurement_to_queue(dataMessage)
+        if 'wholeDict' in self.config[dict]:
+            dataMessage = self.whole_dict_message(values_dict, dict)
+            if dataMessage:
+                self.send_measurement_to_queue(dataMessage)
+
+    def whole_dict_message(self, values_dict, dict):
+        if self.config[dict]['wholeDict'].get('format', 'string') == 'spectrum':
+            return self.whole_dict_spectrum_message(values_dict, self.config, dict)
+        return self.whole_dict_string_message(values_dict, self.config, dict)
+
+    def whole_dict_spectrum_message(self, values_dict, config, dict):
+        # the dict's keys are the spectrum axis (e.g. m/z) and its values the intensities;
+        # both go to the collector as little-endian float32 bytes for the spectrum table
+        try:
+            axis = np.fromiter(values_dict.keys(), dtype='<f4', count=len(values_dict))
+            values = np.fromiter(values_dict.values(), dtype='<f4', count=len(values_dict))
+        except Exception as e:
+            self.logger.error(f'Cannot convert {dict} to a spectrum: {e}')
+            return None
+        if not len(axis):
+            return None
+        message = {'platform':config['platform'], 'instrument':config['instrument'], 'parameter':config[dict]['wholeDict']['parameter'], 'unit':config[dict]['wholeDict']['unit'], 'acquisition_type':config[dict]['wholeDict']['acqType'], 'acquisition_time':datetime.now().replace(microsecond=0), 'sample_time':datetime.now().replace(microsecond=0) - timedelta(seconds = self.measurement_delay)}
+        message['spectrum_axis'] = axis.tobytes()
+        message['spectrum'] = values.tobytes()
+        return message
+
     def whole_dict_string_message(self, values_dict, config, dict):
         message = {'platform':config['platform'], 'instrument':config['instrument'], 'parameter':config[dict]['wholeDict']['parameter'], 'unit':config[dict]['wholeDict']['unit'], 'acquisition_type':config[dict]['wholeDict']['acqType'], 'acquisition_time':datetime.now().replace(microsecond=0), 'sample_time':datetime.now().replace(microsecond=0) - timedelta(seconds = self.measurement_delay)}
         value_string = str(values_dict).replace(',', ';')
@@ -717,9 +2210,11 @@ class NetworkStreamingAcquirer(NetworkAcquirer):
                     self.logger.error('Error reading from network socket '+int(self.config['network']['port'])+' :'+ str(e))
                 else:
                     if message:
-                        dicts = self.config['dictionaries'].split(',')
+                        dicts = self.dictionaries
                         for dict in dicts:
-                            if dict in message: 
+                            if dict in message and self.direct_values:
+                                self.process_values_dict(dict, message[dict])
+                            elif dict in message: 
                                 values_dict = message[dict]
                                 if 'keys' in self.config[dict]:
                                     values_string = self.measurement_dict_to_text_line(values_dict, self.config[dict]['keys'])
@@ -737,19 +2232,139 @@ class NetworkStreamingAcquirer(NetworkAcquirer):
                                     if len(dataMessage) > 0:
                                         self.send_measurement_to_queue(dataMessage)
                                 if 'wholeDict' in self.config[dict]:
-                                    dataMessage = self.whole_dict_string_message(values_dict, self.config, dict)
-                                    if len(dataMessage) > 0:
+                                    dataMessage = self.whole_dict_message(values_dict, dict)
+                                    if dataMessage:
                                         self.send_measurement_to_queue(dataMessage)
 
             else:
                 sleep(1)
 
+def nmea_time(s):
+    """Convert an NMEA 'hhmmss[.ss]' time field to a datetime.time."""
+    fraction = s[6:]
+    return time(int(s[0:2]), int(s[2:4]), int(s[4:6]), int(float(fraction) * 1000000) if fraction else 0)
+
+def nmea_number(s):
+    """Convert a numeric NMEA field to a float, or None if it is empty."""
+    return float(s) if s else None
+
+def nmea_degrees(dm, direction, negative):
+    """Convert an NMEA 'dddmm.mmmm' coordinate and its direction to signed degrees, or None if missing."""
+    if dm is None or direction not in ('N', 'S', 'E', 'W'):
+        return None
+    point = dm.find('.')
+    if point < 0:
+        point = len(dm)
+    degrees = float(dm[:point - 2] or 0) + float(dm[point - 2:]) / 60
+    return -degrees if direction == negative else degrees
+
+
+class NmeaParser:
+    """Decodes the GGA, RMC, VTG and HDT sentences without pynmea2.
+
+    parse() returns the sentence type and a dict of its fields, named as pynmea2 names them
+    (so `sentence_types` configs work unchanged) plus `latitude`/`longitude` in signed degrees
+    for GGA and RMC. Times and dates are datetime.time and datetime.date and empty fields None;
+    every other field is left as its text, so callers convert only the fields they use as
+    numbers; pynmea2_text() renders a field recorded as a string the way pynmea2 did.
+    Sentences without a valid checksum raise ValueError.
+    """
+    fields = {
+        'GGA': ('timestamp', 'lat', 'lat_dir', 'lon', 'lon_dir', 'gps_qual', 'num_sats', 'horizontal_dil',
+                'altitude', 'altitude_units', 'geo_sep', 'geo_sep_units', 'age_gps_data', 'ref_station_id'),
+        'RMC': ('timestamp', 'status', 'lat', 'lat_dir', 'lon', 'lon_dir', 'spd_over_grnd', 'true_course',
+                'datestamp', 'mag_variation', 'mag_var_dir', 'mode_indicator', 'nav_status'),
+        'VTG': ('true_track', 'true_track_sym', 'mag_track', 'mag_track_sym', 'spd_over_grnd_kts',
+                'spd_over_grnd_kts_sym', 'spd_over_grnd_kmph', 'spd_over_grnd_kmph_sym', 'faa_mode'),
+        'HDT': ('heading', 'hdg_true'),
+    }
+    # the fields pynmea2 converts to numbers, with its types for them
+    pynmea2_types = {
+        'gps_qual': int, 'altitude': float, 'spd_over_grnd': float, 'true_course': float,
+        'true_track': float, 'mag_track': Decimal, 'spd_over_grnd_kts': Decimal,
+        'spd_over_grnd_kmph': float, 'heading': Decimal,
+    }
+
+    @classmethod
+    def pynmea2_text(cls, name, text):
+        """A field's text as str() of pynmea2's value for it (e.g. gps_qual '01' -> '1'), as string items were recorded."""
+        convert = cls.pynmea2_types.get(name)
+        return str(convert(text) if convert else text)
+
+    @staticmethod
+    def sentence_type(sentence):
+        """'$GPGGA,...' -> 'GGA', without parsing the rest of the sentence."""
+        address = sentence[1:sentence.find(',')]
+        return address[2:] if len(address) == 5 else address
+
+    @staticmethod
+    def checksum(body):
+        checksum = 0
+        for c in body.encode('ascii', errors='replace'):
+            checksum ^= c
+        return checksum
+
+    def parse(self, sentence):
+        star = sentence.rfind('*')
+        if star < 0:
+            raise ValueError('NMEA sentence has no checksum')
+        body = sentence[1:star]
+        if int(sentence[star + 1:star + 3], 16) != self.checksum(body):
+            raise ValueError('NMEA checksum does not match')
+        parts = body.split(',')
+        sentence_type = self.sentence_type(sentence)
+        names = self.fields.get(sentence_type)
+        if names is None:
+            raise ValueError(f'NMEA sentence type {sentence_type} is not supported')
+        values = dict.fromkeys(names)
+        for name, part in zip(names, parts[1:]):
+            if part == '':
+                continue
+            if name == 'timestamp':
+                values[name] = nmea_time(part)
+            elif name == 'datestamp':
+                values[name] = datetime.strptime(part, '%d%m%y').date()
+            else:
+                values[name] = part
+        if 'lat' in values:
+            values['latitude'] = nmea_degrees(values['lat'], values['lat_dir'], 'S')
+            values['longitude'] = nmea_degrees(values['lon'], values['lon_dir'], 'W')
+        return sentence_type, values
+
+
+class NmeaBatch:
+    """The records of one second of NMEA sentences, sent as one queue message.
+
+    The latest sentence of each type replaces the earlier ones, so all the records of one
+    sentence (e.g. a fix's latitude and longitude) are always sent together.
+    """
+    def __init__(self):
+        self.second = None
+        self.sentences = {}  # {sentence type: records}
+
+    def add(self, second, sentence_type, records):
+        self.second = second
+        self.sentences[sentence_type] = records
+
+    def due(self, now):
+        return self.second is not None and now.replace(microsecond=0) != self.second
+
+    def take(self):
+        records = [record for records in self.sentences.values() for record in records]
+        self.second = None
+        self.sentences = {}
+        return records
+
+
 class SerialNmeaGPSAcquirer(SerialStreamAcquirer):
     def __init__(self, configdict):
         SerialStreamAcquirer.__init__(self, configdict)
+        self.nmea_parser = NmeaParser()
+        self.nmea_batch = NmeaBatch()
 
-    def make_measurement_item(self, parameter, unit, value, string=None, timestamp=None):
-        acquisition_time = datetime.now().replace(microsecond=0)
+    def make_measurement_item(self, parameter, unit, value, string=None, timestamp=None, acquisition_time=None):
+        if acquisition_time is None:
+            acquisition_time = datetime.now().replace(microsecond=0)
         sample_time = acquisition_time - timedelta(seconds = self.measurement_delay)
 
         resultDict = {
@@ -769,33 +2384,42 @@ class SerialNmeaGPSAcquirer(SerialStreamAcquirer):
             
 
     def process_nmea_sentence(self, sentence):
+        # Only RMC sentences carry what we record, so skip the rest without parsing them
+        if NmeaParser.sentence_type(sentence) != 'RMC':
+            return None
         try:
-            # Parse the NMEA sentence
-            msg = pynmea2.parse(sentence)
-
-            # Only process messages with position data
-            messages = []
-            if isinstance(msg, pynmea2.types.talker.RMC):
-                timeStamp = msg.timestamp
-                if isinstance(timeStamp,time):
-                    n = datetime.now()
-                    timeStamp = datetime(n.year,n.month,n.day,timeStamp.hour,timeStamp.minute,timeStamp.second)
-                if float(msg.latitude) != 0.0:
-                    messages.append(self.make_measurement_item('latitude','lat',float(msg.latitude),timestamp = timeStamp))
-                if float(msg.longitude) != 0.0:
-                    messages.append(self.make_measurement_item('longitude','lon',float(msg.longitude),timestamp = timeStamp))
-                if msg.spd_over_grnd:
-                    messages.append(self.make_measurement_item('speed','m/s',float(msg.spd_over_grnd)*0.514444,timestamp = timeStamp))
-                if msg.true_course:
-                    messages.append(self.make_measurement_item('direction','deg',float(msg.true_course),timestamp = timeStamp))
-                return messages
-        except pynmea2.ParseError as e:
+            sentence_type, msg = self.nmea_parser.parse(sentence)
+            speed = nmea_number(msg['spd_over_grnd'])
+            course = nmea_number(msg['true_course'])
+        except ValueError as e:
             self.logger.error(f"Failed to parse NMEA sentence: {e}")
+            self.stats.count('parse_errors')
             return None
 
+        # one acquisition time for the whole fix, so its latitude and longitude stay paired
+        acquisition_time = datetime.now().replace(microsecond=0)
+        messages = []
+        timeStamp = msg['timestamp']
+        if isinstance(timeStamp,time):
+            n = datetime.now()
+            timeStamp = datetime(n.year,n.month,n.day,timeStamp.hour,timeStamp.minute,timeStamp.second)
+        if msg['latitude']:
+            messages.append(self.make_measurement_item('latitude','lat',msg['latitude'],timestamp = timeStamp, acquisition_time = acquisition_time))
+        if msg['longitude']:
+            messages.append(self.make_measurement_item('longitude','lon',msg['longitude'],timestamp = timeStamp, acquisition_time = acquisition_time))
+        if speed:
+            messages.append(self.make_measurement_item('speed','m/s',speed*0.514444,timestamp = timeStamp, acquisition_time = acquisition_time))
+        if course:
+            messages.append(self.make_measurement_item('direction','deg',course,timestamp = timeStamp, acquisition_time = acquisition_time))
+        return messages
+
+    def send_nmea_batch(self):
+        message = self.apply_alarms(self.nmea_batch.take())
+        if message:
+            self.send_measurement_to_queue(message)
+
     def run(self):
         buffer = ""
-        timer = datetime.now()
         while True:
             if self.check_serial_open():
                 try:
@@ -810,28 +2434,38 @@ class SerialNmeaGPSAcquirer(SerialStreamAcquirer):
                     lines = buffer.split('\r')
                     
                     # Process each complete sentence in the buffer
+                    self.stats.count('lines_read', len(lines) - 1)
                     for line in lines[:-1]:
                         line = line.strip()
                         if line.startswith('$'):
                             self.logger.debug('NMEA sentence: ' + line)
+                            start = perf_counter()
                             message = self.process_nmea_sentence(line)
+                            self.stats.observe('parse_secs', perf_counter() - start)
                             if message:
-                                message = self.apply_alarms(message)
-                                if (datetime.now() - timer).total_seconds() >= 1:
-                                    self.send_measurement_to_queue(message)
-                                    timer = datetime.now()
+                                # send the previous second's fix before starting on this one
+                                if self.nmea_batch.due(message[0]['acquisition_time']):
+                                    self.send_nmea_batch()
+                                self.nmea_batch.add(message[0]['acquisition_time'], 'RMC', message)
 
                     # Keep the last incomplete sentence in the buffer
                     buffer = lines[-1] if lines[-1] else ""
+
+                    if self.nmea_batch.due(datetime.now()):
+                        self.send_nmea_batch()
                 except Exception as e:
                     self.logger.error('Error reading serial port ' + self.config['serial']['device'] + ' :' + str(e))
 
 class SerialNmeaAcquirer(SerialStreamAcquirer):
     def __init__(self, configdict):
         SerialStreamAcquirer.__init__(self, configdict)
+        self.sentence_types = self.config['data']['sentence_types']
+        self.nmea_parser = NmeaParser()
+        self.nmea_batch = NmeaBatch()
 
-    def make_measurement_item(self, parameter, unit, value, acquisition_type='GPS', string=None, timestamp=None):
-        acquisition_time = datetime.now().replace(microsecond=0)
+    def make_measurement_item(self, parameter, unit, value, acquisition_type='GPS', string=None, timestamp=None, acquisition_time=None):
+        if acquisition_time is None:
+            acquisition_time = datetime.now().replace(microsecond=0)
         sample_time = acquisition_time - timedelta(seconds = self.measurement_delay)
 
         resultDict = {
@@ -851,50 +2485,81 @@ class SerialNmeaAcquirer(SerialStreamAcquirer):
             
 
     def process_nmea_sentence(self, sentence):
+        msg_type = NmeaParser.sentence_type(sentence)
+        # skip sentence types nobody has configured without parsing them
+        if msg_type not in self.sentence_types:
+            return []
         try:
-            # Parse the NMEA sentence
-            msg = pynmea2.parse(sentence)
-            msg_type = msg.sentence_type
-            messages = []
-            if msg_type in self.config['data']['sentence_types']:
-                for item in self.config['data']['sentence_types'][msg_type].keys():
-                    value = getattr(msg, item, None)
-                    if value is not None:
-                        parameter = self.config['data']['sentence_types'][msg_type][item]['parameter']
-                        unit = self.config['data']['sentence_types'][msg_type][item]['unit']
-                        aquType = self.config['data']['sentence_types'][msg_type][item]['acqType'] 
-                        format = self.config['data']['sentence_types'][msg_type][item]['format']
-                        if format == 'f':
-                            value = float(value)
-                            scaler = self.config['data']['sentence_types'][msg_type][item].get('scaler', None)
-                            if scaler:
-                                value = value * scaler
-                        elif format == 's':
-                            value = str(value)
-                        # filter out lonigitudes and latitudes of zero
-                        if (parameter == 'latitude' or parameter == 'longitude') and value == 0:
-                            continue
-                        message = self.make_measurement_item(parameter, unit, value, acquisition_type=aquType, string=(format == 's'))
-                        messages.append(message)
-            return messages
-        except pynmea2.ParseError as e:
+            own_parser = msg_type in NmeaParser.fields
+            if own_parser:
+                msg_type, fields = self.nmea_parser.parse(sentence)
+                get_value = fields.get
+            else:
+                # anything else is left to pynmea2
+                msg = pynmea2.parse(sentence)
+                msg_type = msg.sentence_type
+                get_value = lambda item: getattr(msg, item, None)
+        except (ValueError, pynmea2.ParseError) as e:
             self.logger.error(f"Failed to parse NMEA sentence: {e}")
+            self.stats.count('parse_errors')
             return None
+        messages = []
+        # one acquisition time for the whole sentence, so e.g. a latitude and longitude stay paired
+        acquisition_time = datetime.now().replace(microsecond=0)
+        if msg_type in self.sentence_types:
+            for item in self.sentence_types[msg_type].keys():
+                value = get_value(item)
+                if value is not None:
+                    parameter = self.sentence_types[msg_type][item]['parameter']
+                    unit = self.sentence_types[msg_type][item]['unit']
+                    aquType = self.sentence_types[msg_type][item]['acqType'] 
+                    format = self.sentence_types[msg_type][item]['format']
+                    if format == 'f':
+                        try:
+                            value = float(value)
+                        except ValueError:
+                            self.logger.error(f"Failed to parse NMEA {msg_type} field {item}: {value!r}")
+                            self.stats.count('parse_errors')
+                            continue
+                        scaler = self.sentence_types[msg_type][item].get('scaler', None)
+                        if scaler:
+                            value = value * scaler
+                    elif format == 's':
+                        try:
+                            value = NmeaParser.pynmea2_text(item, value) if own_parser else str(value)
+                        except (ValueError, ArithmeticError):
+                            self.logger.error(f"Failed to parse NMEA {msg_type} field {item}: {value!r}")
+                            self.stats.count('parse_errors')
+                            continue
+                    # filter out lonigitudes and latitudes of zero
+                    if (parameter == 'latitude' or parameter == 'longitude') and value == 0:
+                        continue
+                    message = self.make_measurement_item(parameter, unit, value, acquisition_type=aquType, string=(format == 's'), acquisition_time=acquisition_time)
+                    messages.append(message)
+        return messages
+
+    def send_nmea_batch(self):
+        message = self.apply_alarms(self.nmea_batch.take())
+        if message:
+            self.send_measurement_to_queue(message)
 
     def run(self):
-        timer = datetime.now()
         while True:
             if self.check_serial_open():
                 try:
                     line = self.getline()
                     if line is not None and line.startswith('$'):
                         self.logger.debug('NMEA sentence: ' + line)
+                        start = perf_counter()
                         message = self.process_nmea_sentence(line)
+                        self.stats.observe('parse_secs', perf_counter() - start)
                         if message:
-                            message = self.apply_alarms(message)
-                            if (datetime.now() - timer).total_seconds() >= 1:
-                                self.send_measurement_to_queue(message)
-                                timer = datetime.now()
+                            # send the previous second's sentences before starting on this one
+                            if self.nmea_batch.due(message[0]['acquisition_time']):
+                                self.send_nmea_batch()
+                            self.nmea_batch.add(message[0]['acquisition_time'], NmeaParser.sentence_type(line), message)
+                    if self.nmea_batch.due(datetime.now()):
+                        self.send_nmea_batch()
                 except Exception as e:
                     self.logger.error('Error reading serial port ' + self.config['serial']['device'] + ' :' + str(e))
 
@@ -975,122 +2640,345 @@ class SimulatedGPSAcquirer(SerialNmeaGPSAcquirer):
             sleep(cycle_interval)
 
 
+class LoadSimulatorAcquirer(Acquirer):
+    """Load generator: sends records through the normal queue path at a set rate, for sizing the collector and database.
+
+    Synthetic mode sends random walks for `instruments` x `parameters` synthetic parameters from a
+    fixed seed (plus a GPS track if asked), so runs are repeatable. Replay mode sends the records
+    of a long-format measurements CSV written by filers/dayfile.py, GPS track included, with their
+    original spacing divided by `replay_speed`.
+    """
+    def __init__(self, configdict):
+        Acquirer.__init__(self, configdict)
+        load = self.config.get('load', {})
+        self.seed = load.get('seed', 0)
+        self.num_instruments = int(load.get('instruments', 10))
+        self.num_parameters = int(load.get('parameters', 10))
+        self.records_per_sec = float(load.get('records_per_sec', 1000))
+        self.gps = load.get('gps', True)
+        self.replay_file = load.get('replay_file')
+        self.replay_speed = float(load.get('replay_speed', 1))
+        self.replay_loop = load.get('replay_loop', False)
+        self.report_secs = load.get('report_secs', 60)
+        self.records_sent = 0
+        self.late_ticks = 0
+        if self.replay_file:
+            load_drivers(['pandas'])
+            self.replay_groups = self.load_replay(self.replay_file)
+
+    def load_replay(self, filename):
+        """Read a dayfile long CSV into [(seconds from the first sample, [records])], one entry per sample time."""
+        df = pd.read_csv(filename, usecols=lambda c: c in ('sample_time', 'instrument', 'parameter', 'unit', 'acquisition_type', 'value', 'string'))
+        # dayfile writes UTC times with an offset; only their spacing matters here
+        df['sample_time'] = pd.to_datetime(df['sample_time'], utc=True)
+        df = df.sort_values('sample_time', kind='stable')
+        for column in ('instrument', 'parameter', 'unit', 'acquisition_type'):
+            df[column] = df[column].fillna('').astype(str)
+        first = df['sample_time'].iloc[0]
+        platform = self.config['platform']
+        groups = []
+        for sample_time, rows in df.groupby('sample_time', sort=True):
+            records = []
+            for instrument, parameter, unit, acquisition_type, value, string in zip(
+                    rows['instrument'], rows['parameter'], rows['unit'], rows['acquisition_type'],
+                    rows['value'], rows['string'] if 'string' in rows else [None] * len(rows)):
+                record = {'platform': platform, 'instrument': instrument, 'parameter': parameter,
+                          'unit': unit, 'acquisition_type': acquisition_type}
+                if value == value:  # not NaN
+                    record['value'] = float(value)
+                if isinstance(string, str):
+                    record['string'] = string
+                records.append(record)
+            groups.append(((sample_time - first).total_seconds(), records))
+        self.logger.info(f"Replay file {filename}: {len(df)} records at {len(groups)} sample times over {groups[-1][0] if groups else 0} seconds")
+        return groups
+
+    def send_records(self, records, acquisition_time):
+        # one message per instrument, as the instruments' own acquirers would send them
+        sample_time = acquisition_time - timedelta(seconds=self.measurement_delay)
+        messages = defaultdict(list)
+        for template in records:
+            record = dict(template)
+            record['acquisition_time'] = acquisition_time
+            record['sample_time'] = sample_time
+            messages[record['instrument']].append(record)
+        for message in messages.values():
+            self.send_measurement_to_queue(self.apply_alarms(message))
+        self.records_sent += len(records)
+
+    def report(self, start):
+        elapsed = perf_counter() - start
+        self.logger.info(f"Load: {self.records_sent} records in {elapsed:.0f} s ({self.records_sent / max(elapsed, 1e-9):.0f} records/s), {self.late_ticks} sends late")
+
+    def run_replay(self):
+        while True:
+            start = perf_counter()
+            last_report = start
+            for offset, records in self.replay_groups:
+                due = start + offset / self.replay_speed
+                delay = due - perf_counter()
+                if delay > 0:
+                    sleep(delay)
+                elif delay < -1:
+                    self.late_ticks += 1
+                self.send_records(records, datetime.now().replace(microsecond=0))
+                if perf_counter() - last_report >= self.report_secs:
+                    self.report(start)
+                    last_report = perf_counter()
+            self.report(start)
+            if not self.replay_loop:
+                return
+
+    def run_synthetic(self):
+        rng = np.random.default_rng(self.seed)
+        platform = self.config['platform']
+        instruments = [f"{self.config['instrument']}_{i:03d}" for i in range(self.num_instruments)]
+        templates = [[{'platform': platform, 'instrument': instrument, 'parameter': f"param_{j:03d}",
+                       'unit': 'unit', 'acquisition_type': 'measurement_raw'} for j in range(self.num_parameters)]
+                     for instrument in instruments]
+        values = rng.normal(0, 1, (self.num_instruments, self.num_parameters))
+        gps_template = [{'platform': platform, 'instrument': f"{self.config['instrument']}_GPS", 'parameter': 'latitude', 'unit': 'lat', 'acquisition_type': 'GPS'},
+                        {'platform': platform, 'instrument': f"{self.config['instrument']}_GPS", 'parameter': 'longitude', 'unit': 'lon', 'acquisition_type': 'GPS'}]
+        position = np.array([37.8719, -122.2585])  # Berkeley
+
+        # every instrument sends one reading of all its parameters per tick
+        ticks_per_sec = self.records_per_sec / (self.num_instruments * self.num_parameters)
+        tick_secs = 1.0 / ticks_per_sec
+        max_catch_up = max(1, int(ticks_per_sec))
+        start = perf_counter()
+        last_report = start
+        ticks = 0
+        gps_ticks = 0
+        while True:
+            # catch up on every tick due, so the average rate holds even where sleep is coarse
+            now = perf_counter()
+            due = int((now - start) / tick_secs) + 1 - ticks
+            if due > max_catch_up:
+                # more than a second behind: drop the backlog rather than send it in a burst
+                self.late_ticks += due - max_catch_up
+                ticks += due - max_catch_up
+                due = max_catch_up
+            acquisition_time = datetime.now().replace(microsecond=0)
+            for _ in range(due):
+                values += rng.normal(0, 0.1, values.shape)
+                for i, instrument_templates in enumerate(templates):
+                    message = []
+                    for template, value in zip(instrument_templates, values[i].tolist()):
+                        record = dict(template)
+                        record['acquisition_time'] = acquisition_time
+                        record['sample_time'] = acquisition_time - timedelta(seconds=self.measurement_delay)
+                        record['value'] = value
+                        message.append(record)
+                    self.send_measurement_to_queue(self.apply_alarms(message))
+                self.records_sent += self.num_instruments * self.num_parameters
+            ticks += due
+            if self.gps and now - start >= gps_ticks:
+                # one fix a second, latitude and longitude in one message
+                gps_ticks += 1
+                position += rng.normal(0, 0.0001, 2)
+                gps = [dict(gps_template[0], value=float(position[0])), dict(gps_template[1], value=float(position[1]))]
+                self.send_records(gps, acquisition_time)
+            if now - last_report >= self.report_secs:
+                self.report(start)
+                last_report = now
+            sleep(max(0, start + ticks * tick_secs - perf_counter()))
+
+    def run(self):
+        if self.replay_file:
+            self.run_replay()
+        else:
+            self.run_synthetic()
+
+
+class GadgetChannel:
+    """One LabGadget parameter, with everything the sampling and output loops need looked up once at startup."""
+    __slots__ = ('name', 'cfg', 'signal_type', 'channel_name', 'handle', 'v_offset', 'scale',
+                 'agg_type', 'period', 'buffer', 'template', 'alarm_rules')
+
+    def __init__(self, name, cfg, platform, instrument):
+        self.name = name
+        self.cfg = cfg
+        self.signal_type = cfg.get('signal_type')
+        self.channel_name = cfg.get('channel_name')
+        self.handle = None  # what the gadget reads the channel through, set by the acquirer
+        # value = (voltage + v_offset) * scale
+        self.v_offset = cfg.get('v_offset', 0.0)
+        self.scale = 1.0
+        self.agg_type = None
+        self.period = None  # seconds between samples, for channels aggregated at aggregate_hz
+        self.buffer = None
+        self.template = {
+            'platform': platform,
+            'instrument': instrument,
+            'parameter': name,
+            'unit': cfg.get('unit', ''),
+            'acquisition_type': cfg.get('aquisition_type', ''),
+        }
+        self.alarm_rules = None
+
+    def convert(self, voltage):
+        return (voltage + self.v_offset) * self.scale
+
+
 class LabGadgetAcquirer(Acquirer):
     def __init__(self, config_dict):
         super().__init__(config_dict)
         self.handle = None
         self.params = config_dict['Parameters']
         self.data_freq = config_dict.get('data_freq_secs', 1)
-        self.buffers = {}  # {param_name: [list of samples]}
-        self.aggregate_info = {}  # {param_name: (agg_type, hz)}
+        self.aggregate_mode = config_dict.get('aggregate_mode', 'buffered')
+        self.gadget_channels = []  # GadgetChannel per parameter, in config order
+        self.overruns = defaultdict(int)  # {param_name or 'output': deadlines missed}
+        self.reported_overruns = 0
+        self.last_overrun_report = perf_counter()
+        self.overrun_report_secs = config_dict.get('overrun_report_secs', 60)
         self.open_gadget()
-        self.setup_buffers()
+        self.setup_channels()
 
     def open_gadget(self):
         # Initialize the signal interface device
         # This method must be implemented by subclasses
         return
 
-    def setup_buffers(self):
+    def setup_channels(self):
+        # flatten the Parameters config into the channel table the loops work from
         for param_entry in self.params:
             for param_name, cfg in param_entry.items():
-                if cfg.get("signal_type") == "Analog" and "aggregate_hz" in cfg and "aggregate" in cfg:
-                    self.buffers[param_name] = []
-                    self.aggregate_info[param_name] = (cfg["aggregate"], cfg["aggregate_hz"])
+                ch = GadgetChannel(param_name, cfg, self.config['platform'], self.config['instrument'])
+                ch.handle = self.channel_handle(ch)
+                if ch.handle is None:
+                    self.logger.error(f"Channel {ch.channel_name} for {param_name} is not available, not reading it")
+                    continue
+                ch.scale = 1.0 / (self.channel_gain(cfg) * cfg.get('v_per_unit', 1.0))
+                if ch.signal_type == "Analog" and "aggregate_hz" in cfg and "aggregate" in cfg:
+                    ch.agg_type = cfg["aggregate"]
+                    ch.period = 1.0 / cfg["aggregate_hz"]
+                    # room for two output periods of samples before the buffer has to grow
+                    ch.buffer = make_sample_buffer(self.aggregate_mode, cfg["aggregate"], capacity=2 * cfg["aggregate_hz"] * self.data_freq)
+                if self.alarm_engine:
+                    ch.alarm_rules = self.alarm_engine.rules.get(param_name)
+                self.gadget_channels.append(ch)
+
+    def channel_handle(self, ch):
+        # what read_voltage/read_state read the channel through, or None if it cannot be read
+        # this method must be implemented by subclasses
+        return ch.channel_name
+
+    def channel_gain(self, cfg):
+        # preamplifier gain to divide readings by
+        return cfg.get('preamp_gain', 1.0)
 
-    def read_analog(self, name, cfg):
+    def read_voltage(self, ch):
+        # raw voltage of an analog channel, or None
         # this method must be implemented by subclasses
         return None
 
-    def read_digital(self, name):
+    def read_state(self, ch):
+        # state of a digital channel, or None
         # this method must be implemented by subclasses
         return None
 
-    def run(self):
-        aggregate_cycle_secs = self.data_freq
-        next_output_time = datetime.now() + timedelta(seconds=aggregate_cycle_secs)
-
-        while True:
-            loop_start = datetime.now()
-            now = datetime.now()
+    def read_channel(self, ch):
+        """Read a channel's value: a converted analog reading or a digital state, or None."""
+        if ch.signal_type == 'Analog':
+            voltage = self.read_voltage(ch)
+            return None if voltage is None else ch.convert(voltage)
+        elif ch.signal_type == 'Digital':
+            return self.read_state(ch)
+        return None
 
-            results = []
+    def next_deadline(self, name, due, period, now):
+        """Return the first deadline after now on the grid due + k * period, counting the deadlines missed as overruns."""
+        missed = int((now - due) // period)
+        if missed > 0:
+            self.overruns[name] += missed
+        return due + (missed + 1) * period
+
+    def report_overruns(self):
+        total = sum(self.overruns.values())
+        if total > self.reported_overruns and perf_counter() - self.last_overrun_report >= self.overrun_report_secs:
+            overrun = {name: count for name, count in self.overruns.items() if count}
+            self.logger.warning(f"Missed sample/output deadlines (total since start): {overrun}")
+            self.reported_overruns = total
+            self.last_overrun_report = perf_counter()
+
+    def make_channel_record(self, ch, value, acquisition_time):
+        record = dict(ch.template)
+        record['acquisition_time'] = acquisition_time
+        record['sample_time'] = acquisition_time - timedelta(seconds=self.measurement_delay)
+        record['value'] = value
+        if ch.alarm_rules:
+            self.alarm_engine.apply_rules(record, ch.alarm_rules)
+        return record
+
+    def output_cycle(self):
+        results = []
+        acquisition_time = datetime.now().replace(microsecond=0)
+        for ch in self.gadget_channels:
+            if ch.buffer is None:
+                # channels without aggregation are only read when they are output
+                value = self.read_channel(ch)
+            elif ch.buffer:
+                value = ch.buffer.aggregate(ch.agg_type)
+                ch.buffer.clear()
+            else:
+                continue
+            if value is not None:
+                results.append(self.make_channel_record(ch, value, acquisition_time))
+        if results:
+            self.send_measurement_to_queue(results)
 
-            for param_entry in self.params:
-                for param_name, cfg in param_entry.items():
-                    signal_type = cfg.get('signal_type')
-                    channel = cfg.get('channel_name')
-
-                    is_aggregated = param_name in self.buffers
-
-                    if signal_type == 'Analog':
-                        value = self.read_analog(channel, cfg)
-                        if value is not None:
-                            if is_aggregated:
-                                self.buffers[param_name].append(value)
-                            elif now >= next_output_time:
-                                record = self.make_record(param_name, value, cfg)
-                                results.append(record)
-
-                    elif signal_type == 'Digital':
-                        if now >= next_output_time:
-                            value = self.read_digital(channel)
-                            if value is not None:
-                                record = self.make_record(param_name, value, cfg)
-                                results.append(record)
-
-            if now >= next_output_time:
-                for param_name, (agg_type, _) in self.aggregate_info.items():
-                    samples = self.buffers.get(param_name, [])
-                    if samples:
-                        if agg_type == 'mean':
-                            agg_value = mean(samples)
-                        elif agg_type == 'max':
-                            agg_value = max(samples)
-                        elif agg_type == 'min':
-                            agg_value = min(samples)
-                        else:
-                            continue
-                        self.buffers[param_name] = []
-                        cfg = next(entry[param_name] for entry in self.params if param_name in entry)
-                        record = self.make_record(param_name, agg_value, cfg)
-                        results.append(record)
-
-                if results:
-                    self.send_measurement_to_queue(self.apply_alarms(results))
-                next_output_time = now + timedelta(seconds=aggregate_cycle_secs)
-
-            # Sleep to match aggregate_hz (if any); otherwise 10 Hz default
-            max_hz = max((hz for _, hz in self.aggregate_info.values()), default=10)
-            sleep_time = 1.0 / max_hz
-            elapsed = (datetime.now() - loop_start).total_seconds()
-            sleep(max(0, sleep_time - elapsed))
-
-
-    def make_record(self, param_name, value, cfg):
-            now = datetime.now().replace(microsecond=0)
-            sample_time = now - timedelta(seconds=self.measurement_delay)
-            return {
-                'platform': self.config['platform'],
-                'instrument': self.config['instrument'],
-                'parameter': param_name,
-                'unit': cfg.get('unit', ''),
-                'acquisition_type': cfg.get('aquisition_type', ''),
-                'acquisition_time': now,
-                'sample_time': sample_time,
-                'value': value
-            }
+    def run(self):
+        # Deadlines are absolute on the monotonic clock, so loop latency never accumulates.
+        # The first output falls on a multiple of the cycle in wall-clock time, which keeps
+        # instruments with the same cycle outputting in the same second.
+        cycle_secs = self.data_freq
+        now = perf_counter()
+        next_output = now + cycle_secs - datetime.now().timestamp() % cycle_secs
+        # aggregated analog channels are sampled at their aggregate_hz, everything else once per output
+        sampled = [ch for ch in self.gadget_channels if ch.period]
+        next_sample = [now] * len(sampled)
 
+        while True:
+            deadline = min(next_output, min(next_sample, default=next_output))
+            delay = deadline - perf_counter()
+            if delay > 0:
+                sleep(delay)
+            now = perf_counter()
+
+            for i, ch in enumerate(sampled):
+                due = next_sample[i]
+                if due > now:
+                    continue
+                voltage = self.read_voltage(ch)
+                if voltage is not None:
+                    ch.buffer.append(ch.convert(voltage))
+                next_sample[i] = self.next_deadline(ch.name, due, ch.period, now)
 
+            if next_output <= now:
+                self.output_cycle()
+                next_output = self.next_deadline('output', next_output, cycle_secs, perf_counter())
+                self.report_overruns()
 
 
 class LabJackAcquirer(LabGadgetAcquirer):
     def __init__(self, config_dict):
+        # the LJM library calls go through self.ljm so a simulated backend can stand in for it
+        self.ljm = self.make_ljm(config_dict)
+        self.read_mode = config_dict.get('read_mode', 'command')
+        self.scan_rate_hz = float(config_dict.get('scan_rate_hz', 1000))
+        self.scans_per_read = int(config_dict.get('scans_per_read', max(1, int(self.scan_rate_hz / 10))))
+        self.stream_running = False
+        # failed stream restarts before the device is closed and opened again
+        self.stream_reopen_after = int(config_dict.get('stream_reopen_after', 2))
         super().__init__(config_dict)
 
+    def make_ljm(self, config_dict):
+        return ljm
+
     def open_gadget(self):
         try:
-            self.handle = ljm.openS(
+            self.handle = self.ljm.openS(
                 self.config.get('device_type', 'ANY'),
                 self.config.get('connection_type', 'ANY'),
                 self.config.get('identifier', 'ANY')
@@ -1105,14 +2993,14 @@ class LabJackAcquirer(LabGadgetAcquirer):
                     # Set double_end if specified
                     if "negative_channel" in cfg:
                         try:
-                            ljm.eWriteName(self.handle, f"{channel}_NEGATIVE_CH", int(cfg["negative_channel"]))
+                            self.ljm.eWriteName(self.handle, f"{channel}_NEGATIVE_CH", int(cfg["negative_channel"]))
                             self.logger.info(f"Set {channel}_NEGATIVE_CH to {cfg['negative_channel']}")
                         except Exception as e:
                             self.logger.warning(f"Could not set double_end for {channel}: {e}")
                     # Set range if specified
                     if "range" in cfg:
                         try:
-                            ljm.eWriteName(self.handle, f"{channel}_RANGE", float(cfg["range"]))
+                            self.ljm.eWriteName(self.handle, f"{channel}_RANGE", float(cfg["range"]))
                             self.logger.info(f"Set {channel}_RANGE to {cfg['range']}")
                         except Exception as e:
                             self.logger.warning(f"Could not set range for {channel}: {e}")
@@ -1120,31 +3008,188 @@ class LabJackAcquirer(LabGadgetAcquirer):
             self.logger.error(f"Failed to open LabJack: {str(e)}")
             raise
 
-    def read_analog(self, name, cfg):
+    def reopen_gadget(self):
+        """Close the device handle and open the device again."""
+        self.logger.warning("Closing and reopening LabJack device")
+        if self.handle is not None:
+            try:
+                self.ljm.close(self.handle)
+            except Exception as e:
+                self.logger.warning(f"Could not close LabJack handle: {e}")
+            self.handle = None
+        self.open_gadget()
+
+    def read_voltage(self, ch):
         try:
-            raw_voltage = ljm.eReadName(self.handle, name)
-            gain = cfg.get('preamp_gain', 1.0)
-            v_offset = cfg.get('v_offset', 0.0)
-            v_per_unit = cfg.get('v_per_unit', 1.0)
-            read_voltage = raw_voltage + v_offset
-            degained_voltage = read_voltage / gain
-            value = degained_voltage / v_per_unit
-            self.logger.debug(f'Labjack Analog read from {name}, raw = {raw_voltage}V, V-offest = {read_voltage}, degained voltage = {degained_voltage}V, v_per_unit = {v_per_unit}V, value = {value}')
-            return value
+            return self.ljm.eReadName(self.handle, ch.handle)
         except Exception as e:
-            self.logger.error(f"Error reading analog channel {name}: {str(e)}")
+            self.logger.error(f"Error reading analog channel {ch.channel_name}: {str(e)}")
             return None
 
-    def read_digital(self, name):
+    def read_state(self, ch):
         try:
-            state = ljm.eReadName(self.handle, name)
+            state = self.ljm.eReadName(self.handle, ch.handle)
             return int(state)
         except Exception as e:
-            self.logger.error(f"Error reading digital channel {name}: {str(e)}")
+            self.logger.error(f"Error reading digital channel {ch.channel_name}: {str(e)}")
             return None
 
+    def start_stream(self, channels):
+        """Start hardware-timed scanning of the analog channels; returns the scan rate the device will use."""
+        addresses, _ = self.ljm.namesToAddresses(len(channels), channels)
+        scan_rate = self.ljm.eStreamStart(self.handle, self.scans_per_read, len(addresses), addresses, self.scan_rate_hz)
+        self.stream_running = True
+        self.logger.info(f"LabJack stream started: {channels} at {scan_rate} scans/s, {self.scans_per_read} scans per read")
+        return scan_rate
+
+    def stop_stream(self):
+        if self.stream_running:
+            self.stream_running = False
+            try:
+                self.ljm.eStreamStop(self.handle)
+            except Exception as e:
+                self.logger.warning(f"Could not stop LabJack stream: {e}")
+
+    def read_stream_block(self, num_channels):
+        """Read the next block of scans as a (scans x channels) array of raw voltages, NaN for skipped samples."""
+        data, device_backlog, ljm_backlog = self.ljm.eStreamRead(self.handle)
+        if ljm_backlog > 10 * self.scans_per_read:
+            self.logger.warning(f"LabJack stream falling behind: {ljm_backlog} scans waiting in LJM, {device_backlog} on the device")
+        block = np.array(data, dtype=np.float64).reshape(-1, num_channels)
+        # LJM fills samples the device skipped with a dummy value
+        block[block == -9999.0] = np.nan
+        return block
+
+    def run_stream(self):
+        # every analog channel is scanned by the device; digital ones are read once per output period
+        analog = [ch for ch in self.gadget_channels if ch.signal_type == 'Analog']
+        digital = [ch for ch in self.gadget_channels if ch.signal_type == 'Digital']
+        if not analog:
+            self.logger.warning("No analog channels to stream, reading channels one at a time")
+            return super().run()
+        channels = [ch.channel_name for ch in analog]
+        # voltage to value conversion, one entry per column
+        v_offset = np.array([ch.v_offset for ch in analog], dtype=np.float64)
+        scale = np.array([ch.scale for ch in analog], dtype=np.float64)
+        # channels without aggregation report their latest sample, as in command mode
+        methods = [ch.agg_type or 'last' for ch in analog]
+
+        failures = 0  # stream failures since the last block read
+        while True:
+            try:
+                if failures >= self.stream_reopen_after:
+                    # restarting the stream on the same handle is not helping, e.g. after a
+                    # USB disconnect or device reset the handle is dead
+                    self.reopen_gadget()
+                scan_rate = self.start_stream(channels)
+                # output periods are counted in scans, so they follow the device clock
+                scans_per_output = max(1, int(round(scan_rate * self.data_freq)))
+                pending = []
+                pending_scans = 0
+                while True:
+                    block = self.read_stream_block(len(channels))
+                    failures = 0
+                    pending.append(block)
+                    pending_scans += len(block)
+                    if pending_scans < scans_per_output:
+                        continue
+                    data = np.concatenate(pending)
+                    done = pending_scans - pending_scans % scans_per_output
+                    for start in range(0, done, scans_per_output):
+                        period = (data[start:start + scans_per_output] + v_offset) * scale
+                        self.send_stream_period(analog, digital, aggregate_columns(period, methods))
+                    pending = [data[done:]]
+                    pending_scans -= done
+            except Exception as e:
+                failures += 1
+                self.logger.error(f"LabJack stream failed ({failures} in a row): {str(e)}")
+                self.stop_stream()
+                sleep(1)
+
+    def send_stream_period(self, analog, digital, values):
+        results = []
+        acquisition_time = datetime.now().replace(microsecond=0)
+        for ch, value in zip(analog, values):
+            if not np.isnan(value):
+                results.append(self.make_channel_record(ch, float(value), acquisition_time))
+        for ch in digital:
+            value = self.read_state(ch)
+            if value is not None:
+                results.append(self.make_channel_record(ch, value, acquisition_time))
+        if results:
+            self.send_measurement_to_queue(results)
+
     def run(self):
-        super().run()
+        if self.read_mode == 'stream':
+            self.run_stream()
+        else:
+            super().run()
+
+
+class SimulatedLJM:
+    """Stand-in for the labjack.ljm module, so LabJackAcquirer runs without a device.
+
+    Analog channels (AINn) read a sine with a period of n+2 seconds plus noise, digital
+    channels toggle every 10 seconds. Stream reads are paced to the scan rate, as a device's are.
+    """
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.registers = {}
+        self.scan_list = None
+
+    def openS(self, device_type, connection_type, identifier):
+        return 1
+
+    def close(self, handle):
+        self.eStreamStop(handle)
+
+    def eWriteName(self, handle, name, value):
+        self.registers[name] = value
+
+    def signal(self, names, t):
+        values = []
+        for name in names:
+            if name.startswith('AIN'):
+                n = int(name[3:])
+                values.append(1.0 + 0.5 * np.sin(2 * np.pi * t / (n + 2)) + self.rng.normal(0, 0.01, np.shape(t)))
+            else:
+                values.append((np.asarray(t) // 10) % 2)
+        return values
+
+    def eReadName(self, handle, name):
+        return float(self.signal([name], perf_counter())[0])
+
+    def namesToAddresses(self, num_frames, names):
+        # the names are kept as the 'addresses', since only this class reads them
+        return list(names[:num_frames]), [3] * num_frames
+
+    def eStreamStart(self, handle, scans_per_read, num_addresses, scan_list, scan_rate):
+        self.scan_list = list(scan_list[:num_addresses])
+        self.scans_per_read = scans_per_read
+        self.scan_rate = float(scan_rate)
+        self.stream_start = perf_counter()
+        self.scans_read = 0
+        return self.scan_rate
+
+    def eStreamRead(self, handle):
+        if self.scan_list is None:
+            raise RuntimeError('stream not started')
+        t = self.stream_start + (self.scans_read + np.arange(self.scans_per_read)) / self.scan_rate
+        wait = t[-1] - perf_counter()
+        if wait > 0:
+            sleep(wait)
+        self.scans_read += self.scans_per_read
+        backlog = max(0, int((perf_counter() - t[-1]) * self.scan_rate))
+        data = np.column_stack(self.signal(self.scan_list, t)).ravel()
+        return data.tolist(), 0, backlog
+
+    def eStreamStop(self, handle):
+        self.scan_list = None
+
+
+class SimulatedLabJackAcquirer(LabJackAcquirer):
+    def make_ljm(self, config_dict):
+        return SimulatedLJM(config_dict.get('seed'))
 
 
 voltage_reported = False
@@ -1160,14 +3205,53 @@ class PhidgetAcquirer(LabGadgetAcquirer):
     def __init__(self, config_dict):
         self.channels = {}
         self.voltage_reported = False
+        # 'poll' reads each channel from the loop; 'event' lets the Phidget library call us with new samples
+        self.read_mode = config_dict.get('read_mode', 'poll')
+        self.event_buffers = {}  # {param_name: [filling RingBuffer, spare RingBuffer]}
+        self.event_locks = {}  # {param_name: Lock guarding the append and the swap}
+        self.last_states = {}  # {param_name: latest digital state}
         super().__init__(config_dict)
 
-
+    def setup_event_buffers(self, param_name, cfg):
+        # the change handlers append from the Phidget library's thread; the output loop
+        # swaps in the spare buffer under the same lock and aggregates the filled one after
+        # releasing it, so the lock is only ever held for an append or a swap
+        data_interval_ms = cfg.get('data_interval_ms', 250)
+        capacity = 2 * int(np.ceil(self.data_freq * 1000 / data_interval_ms)) + 1
+        self.event_buffers[param_name] = [RingBuffer(capacity, grow=False), RingBuffer(capacity, grow=False)]
+        self.event_locks[param_name] = threading.Lock()
+
+    def make_voltage_handler(self, param_name, cfg):
+        buffers = self.event_buffers[param_name]
+        lock = self.event_locks[param_name]
+        v_offset = cfg.get('v_offset', 0.0)
+        v_per_unit = cfg.get('v_per_unit', 1.0)
+        def on_voltage_change(channel, voltage):
+            value = (voltage + v_offset) / v_per_unit
+            with lock:
+                buffers[0].append(value)
+        return on_voltage_change
+
+    def make_state_handler(self, param_name):
+        buffers = self.event_buffers[param_name]
+        lock = self.event_locks[param_name]
+        def on_state_change(channel, state):
+            with lock:
+                buffers[0].append(state)
+        return on_state_change
+
+    def set_data_interval(self, channel, param_name, cfg):
+        if 'data_interval_ms' in cfg:
+            try:
+                channel.setDataInterval(int(cfg['data_interval_ms']))
+            except Exception as e:
+                self.logger.warning(f"Could not set data interval for {param_name}: {e}")
 
     def open_gadget(self):
         # Implementation for opening Phidget device
         global voltage_reported
         serial_number = self.config.get('identifier', None)
+        events = self.read_mode == 'event'
         for parameter_entry in self.config.get("Parameters", []):
             for param_name, cfg in parameter_entry.items():
                 channel = cfg.get("channel_name")
@@ -1178,11 +3262,18 @@ class PhidgetAcquirer(LabGadgetAcquirer):
                         voltageInput = VoltageInput()
                         voltageInput.setHubPort(int(cfg.get('channel_name')))
                         voltageInput.setDeviceSerialNumber(int(serial_number))
+                        if events:
+                            self.setup_event_buffers(param_name, cfg)
+                            voltageInput.setOnVoltageChangeHandler(self.make_voltage_handler(param_name, cfg))
 
                         #voltageInput.setOnVoltageChangeHandler(onVoltageChange)
                         try:
                             voltage_reported = False
                             voltageInput.openWaitForAttachment(5000)
+                            self.set_data_interval(voltageInput, param_name, cfg)
+                            if events:
+                                # report every data interval, not only when the voltage moves
+                                voltageInput.setVoltageChangeTrigger(0)
                             while voltage_reported == False:
                                 sleep(0.5)
                                 try:
@@ -1198,39 +3289,93 @@ class PhidgetAcquirer(LabGadgetAcquirer):
                         digitalInput = DigitalInput()
                         digitalInput.setHubPort(int(cfg.get('channel_name')))
                         digitalInput.setDeviceSerialNumber(int(serial_number))
+                        if events:
+                            self.setup_event_buffers(param_name, cfg)
+                            digitalInput.setOnStateChangeHandler(self.make_state_handler(param_name))
                         try:
                             digitalInput.openWaitForAttachment(5000)
+                            self.set_data_interval(digitalInput, param_name, cfg)
                             self.channels[str(channel)]['channel'] = digitalInput
+                            if events:
+                                # state change events only come on changes, so start from the current state
+                                self.last_states[param_name] = digitalInput.getState()
                         except Exception as e:
                             self.logger.error(f"Could not attach Phidget digital input for {param_name}: {e}")
 
-    def read_analog(self, name, cfg):
-        # Implementation for reading analog from Phidget
-        channel = self.channels[str(name)]['channel']
-        voltage = None
+    def channel_handle(self, ch):
+        # the attached VoltageInput/DigitalInput, or None if it did not attach
+        return self.channels.get(str(ch.channel_name), {}).get('channel')
+
+    def channel_gain(self, cfg):
+        # Phidget voltage inputs have no preamplifier setting
+        return 1.0
+
+    def read_voltage(self, ch):
         try:
-            voltage = channel.getVoltage()
+            return ch.handle.getVoltage()
         except Exception as e:
-            self.logger.error(f"Error reading analog channel {name}: {str(e)}")
+            self.logger.error(f"Error reading analog channel {ch.channel_name}: {str(e)}")
             return None
-        v_offset = cfg.get('v_offset', 0.0)
-        v_per_unit = cfg.get('v_per_unit', 1.0)
-        value = (voltage + v_offset) / v_per_unit
-        return value
 
-    def read_digital(self, name):
-        # Implementation for reading digital from Phidget
-        channel = self.channels[str(name)]['channel']
-        state = None
+    def read_state(self, ch):
         try:
-            state = channel.getState()
+            return ch.handle.getState()
         except Exception as e:
-            self.logger.error(f"Error reading digital channel {name}: {str(e)}")
+            self.logger.error(f"Error reading digital channel {ch.channel_name}: {str(e)}")
             return None
-        return state
+
+    def drain_event_buffer(self, param_name):
+        """Swap the channel's buffers and return the one the handler was filling.
+
+        The handler only appends to buffers[0] while holding the lock, so once the swap is done
+        the returned buffer is the caller's until the next swap.
+        """
+        buffers = self.event_buffers[param_name]
+        with self.event_locks[param_name]:
+            filled = buffers[0]
+            buffers[0] = buffers[1]
+            buffers[1] = filled
+        return filled
+
+    def output_events(self):
+        results = []
+        acquisition_time = datetime.now().replace(microsecond=0)
+        for ch in self.gadget_channels:
+            if ch.name not in self.event_buffers:
+                continue
+            samples = self.drain_event_buffer(ch.name)
+            # parameters without aggregation report their latest sample
+            value = samples.aggregate(ch.cfg.get('aggregate', 'last')) if samples else None
+            if ch.signal_type == 'Digital':
+                # a digital input stays in the state it last changed to
+                if samples:
+                    self.last_states[ch.name] = samples.aggregate('last')
+                if value is None:
+                    value = self.last_states.get(ch.name)
+            samples.clear()
+            if value is not None:
+                results.append(self.make_channel_record(ch, value, acquisition_time))
+        if results:
+            self.send_measurement_to_queue(results)
+
+    def run_events(self):
+        # the handlers do the sampling, so the loop only wakes once per output period,
+        # on the same wall-clock-aligned deadlines as LabGadgetAcquirer.run
+        cycle_secs = self.data_freq
+        next_output = perf_counter() + cycle_secs - datetime.now().timestamp() % cycle_secs
+        while True:
+            delay = next_output - perf_counter()
+            if delay > 0:
+                sleep(delay)
+            self.output_events()
+            next_output = self.next_deadline('output', next_output, cycle_secs, perf_counter())
+            self.report_overruns()
 
     def run(self):
-        super().run()
+        if self.read_mode == 'event':
+            self.run_events()
+        else:
+            super().run()
 
 class AquirerFactory():
     
@@ -1262,19 +3407,37 @@ class AquirerFactory():
         acquirer = SimulatedGPSAcquirer(config)
         return acquirer
 
+    def makeLoadSimulatorAcquirer(self, config):
+        return LoadSimulatorAcquirer(config)
+
     def makeLabJackAcquirer(self, config):
         return LabJackAcquirer(config)
+
+    def makeSimulatedLabJackAcquirer(self, config):
+        return SimulatedLabJackAcquirer(config)
     
     def makePhidgetAcquirer(self, config):
         acquirer = PhidgetAcquirer(config)
         return acquirer
 
 
-    selector = {'simpleSerial':makeSerialAcquirer, 'simulated':makeSimulatorAcquirer, 'networkStreaming':makeNetworkStreamingAcquirer, 'serial_nmea_GPS':makeSerialNmeaGPSAcquirer, 'serial_nmea':makeSerialNmeaAcquirer, 'serialPolled':makeSerialPolledAcquirer, 'simulated_GPS': makeSimulatedGPSAcquirer, 'LabJack': makeLabJackAcquirer, 'Phidget': makePhidgetAcquirer}
+    selector = {'simpleSerial':makeSerialAcquirer, 'simulated':makeSimulatorAcquirer, 'networkStreaming':makeNetworkStreamingAcquirer, 'serial_nmea_GPS':makeSerialNmeaGPSAcquirer, 'serial_nmea':makeSerialNmeaAcquirer, 'serialPolled':makeSerialPolledAcquirer, 'simulated_GPS': makeSimulatedGPSAcquirer, 'load_simulator': makeLoadSimulatorAcquirer, 'LabJack': makeLabJackAcquirer, 'simulated_LabJack': makeSimulatedLabJackAcquirer, 'Phidget': makePhidgetAcquirer}
+
+    # driver modules (see driver_imports) each acquirer type needs
+    drivers = {'simpleSerial':['serial'], 'simulated':[], 'networkStreaming':['zmq'], 'serial_nmea_GPS':['serial'], 'serial_nmea':['serial', 'pynmea2'], 'serialPolled':['serial'], 'simulated_GPS': ['pandas'], 'load_simulator': [], 'LabJack': ['ljm'], 'simulated_LabJack': [], 'Phidget': ['phidget']}
 
     def make(self,config):
         maker = self.selector[config['type']]
-        return maker(self,config)
+        drivers = self.drivers.get(config['type'], [])
+        start = perf_counter()
+        load_drivers(drivers)
+        imported = perf_counter()
+        acquirer = maker(self,config)
+        made = perf_counter()
+        logging.getLogger(config['logs']['logger_name']).info(
+            f"Startup: {config['type']} acquirer for {config['instrument']}, "
+            f"driver imports {drivers} took {imported - start:.3f} s, acquirer setup took {made - imported:.3f} s")
+        return acquirer
 
     
 
@@ -0,0 +1,113 @@
+#!/usr/bin python3
+"""
+
+VanDAQ
+Mobile Atmospheric Data Acquisition System
+
+Author: Robert Jay (Robin) Weber
+Affiliation: University of California, Berkeley
+
+Copyright (c) 2025 The Regents of the University of California
+Released under the BSD 3-Clause License.
+"""
+
+# Runs several acquirers in one process, one thread per instrument.
+# usage: vandaq_acquirer_host.py config1.yaml [config2.yaml ...]
+
+import acquirers
+from acquirers import AquirerFactory, SharedQueueWriter
+import yaml
+import logging
+from logging.handlers import TimedRotatingFileHandler
+import threading
+import sys
+import os
+from time import sleep
+
+
+restart_delay_secs = 10
+
+if len(sys.argv) < 2:
+    print("Error: Must supply one or more configuration files")
+    exit()
+
+logging.basicConfig(
+    format="{asctime} - {threadName} - {levelname} - {message}",
+    style="{",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+host_logger = logging.getLogger('acquirer_host')
+host_logger.setLevel(logging.INFO)
+
+
+def load_config(filename):
+    try:
+        configfile = open(filename,'r')
+        config = yaml.load(configfile, Loader=yaml.FullLoader)
+        configfile.close()
+        return config
+    except Exception as e:
+        host_logger.error(f"Cannot load config file {filename}: {e}")
+        return None
+
+def setup_logger(config):
+    # same per-instrument log files as vandaq_acquirer.py
+    log_file = os.path.join(config['logs']['log_dir'], config['logs']['log_file'])
+    logger = logging.getLogger(config['logs']['logger_name'])
+    logger.setLevel(config['logs']['log_level'])
+    handler = TimedRotatingFileHandler(log_file, when="midnight", interval=1, backupCount=30, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("{asctime} - {levelname} - {message}", style="{", datefmt="%Y-%m-%d %H:%M:%S"))
+    logger.addHandler(handler)
+    logger.propagate = False
+    return logger
+
+def run_acquirer(config):
+    # Build and run one acquirer, rebuilding it after a failure so one
+    # faulty instrument does not take the others down
+    logger = logging.getLogger(config['logs']['logger_name'])
+    factory = AquirerFactory()
+    while True:
+        acq = None
+        try:
+            acq = factory.make(config)
+            acq.run()
+            logger.error(f"Acquirer for {config['instrument']} stopped running")
+        except Exception as e:
+            logger.exception(f"Acquirer for {config['instrument']} failed: {e}")
+        if acq:
+            # stop its batcher and spill threads before a new instance replaces them
+            try:
+                acq.close()
+            except Exception as e:
+                logger.exception(f"Error closing acquirer for {config['instrument']}: {e}")
+        host_logger.warning(f"Restarting acquirer for {config['instrument']} in {restart_delay_secs} seconds")
+        sleep(restart_delay_secs)
+
+
+configs = []
+for filename in sys.argv[1:]:
+    config = load_config(filename)
+    if config:
+        configs.append(config)
+
+# one writer per posix queue, shared by every acquirer that sends to it,
+# sized for the largest settings any of them asks for
+queue_configs = {}
+for config in configs:
+    name = config['queue']['name']
+    queue_config = queue_configs.setdefault(name, {'name': name, 'max_msgs': 0, 'max_msg_size': 0})
+    queue_config['max_msgs'] = max(queue_config['max_msgs'], config['queue']['max_msgs'])
+    queue_config['max_msg_size'] = max(queue_config['max_msg_size'], config['queue']['max_msg_size'])
+for name, queue_config in queue_configs.items():
+    acquirers.shared_queues[name] = SharedQueueWriter(queue_config, host_logger)
+
+threads = []
+for config in configs:
+    setup_logger(config)
+    thread = threading.Thread(target=run_acquirer, args=(config,), name=config['instrument'], daemon=True)
+    thread.start()
+    threads.append(thread)
+    host_logger.info(f"Started acquirer thread for {config['instrument']} ({config['type']})")
+
+for thread in threads:
+    thread.join()
@@ -30,6 +30,7 @@ from sqlalchemy import create_engine, and_, text, insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, relationship
 from vandaq_schema import *
+from vandaq_wire import WireSerializer, WireColumns, NONE, HAS_VALUE, HAS_STRING
 from collections import defaultdict
 import re
 
@@ -86,6 +87,9 @@ class Inserter:
         self.insert_batch_seconds = self.config.get('insert_batch_seconds',1)
         self.cache_time_seconds = self.config.get('cache_time_seconds', 3600)
         self.load_dimension_cache()
+        self.alarm_events = has_alarm_event_columns(engine)
+        if not self.alarm_events:
+            self.logger.info('alarm table has no alarm_event/duration_secs columns, alarm events are stored as plain alarms')
         
     def ensure_session_ready(self):
         # Check if the session is already in a transaction
@@ -243,8 +247,10 @@ class Inserter:
             # Build the core insert statement
             stmt = insert(FactAlarm)
             
-            # Execute with multiple rows of data
-            result = self.session.execute(stmt, alarms)
+            # Execute with multiple rows of data, in a savepoint so a failure
+            # rolls back the alarms only and not the batch's measurements
+            with self.session.begin_nested():
+                result = self.session.execute(stmt, alarms)
        
         except IntegrityError as e:
             self.logger.error(f"batch_insert_alarms integrity error: {str(e)}")
@@ -253,6 +259,16 @@ class Inserter:
             self.logger.error(f"batch_insert_alarms unknown error: {str(e)}")
             return []    
 
+    def batch_insert_spectra(self, spectra):
+        if len(spectra) == 0:
+            return
+        try:
+            self.session.execute(insert(FactSpectrum), spectra)
+        except IntegrityError as e:
+            self.logger.error(f"batch_insert_spectra integrity error: {str(e)}")
+        except Exception as e:
+            self.logger.error(f"batch_insert_spectra unknown error: {str(e)}")
+
     def batch_insert_geolocations(self, geolocations):
         if len(geolocations) == 0:
             return
@@ -285,39 +301,129 @@ class Inserter:
         ]
         return merged_records
         
+    def get_dimension_ids(self, platform, instrument, parameter, unit, acquisition_type):
+        return {
+            'platform_id': self.get_or_create_dimension(DimPlatform, 'platform', platform, 'platform'),
+            'instrument_id': self.get_or_create_dimension(DimInstrument, 'instrument', instrument, 'instrument'),
+            'parameter_id': self.get_or_create_dimension(DimParameter, 'parameter', parameter, 'parameter'),
+            'unit_id': self.get_or_create_dimension(DimUnit, 'unit', unit, 'unit'),
+            'acquisition_type_id': self.get_or_create_dimension(DimAcquisitionType, 'acquisition_type', acquisition_type, 'acquisition_type'),
+        }
+
     def insert_subbatch(self, messages):
         measurements = []
-        alarms = []
         coordinates = []
+        spectra = []
         # Prepare and batch insert measurements
         self.ensure_session_ready()
         self.session.begin()
+        # records of one stream repeat the same dimension strings and times, so look each combination up once
+        dimension_ids = {}
+        time_ids = {}
+        def time_id(time):
+            if time not in time_ids:
+                time_ids[time] = self.get_or_create_time_dimension(time)
+            return time_ids[time]
         for message in messages:
-            measurement = {
-                'platform_id': self.get_or_create_dimension(DimPlatform, 'platform', message['platform'], 'platform'),
-                'instrument_id': self.get_or_create_dimension(DimInstrument, 'instrument', message['instrument'], 'instrument'),
-                'parameter_id': self.get_or_create_dimension(DimParameter, 'parameter', message['parameter'], 'parameter'),
-                'unit_id': self.get_or_create_dimension(DimUnit, 'unit', message['unit'], 'unit'),
-                'acquisition_type_id': self.get_or_create_dimension(DimAcquisitionType, 'acquisition_type', message['acquisition_type'], 'acquisition_type'),
+            dimension_key = (message['platform'], message['instrument'], message['parameter'], message['unit'], message['acquisition_type'])
+            ids = dimension_ids.get(dimension_key)
+            if ids is None:
+                ids = self.get_dimension_ids(*dimension_key)
+                dimension_ids[dimension_key] = ids
+            if 'spectrum' in message:
+                # array measurements go to the spectrum table
+                spectrum = dict(ids)
+                spectrum.update({
+                    'sample_time': message.get('sample_time'),
+                    'acquisition_time_id': time_id(message.get('acquisition_time')),
+                    'instrument_time_id': time_id(message.get('instrument_time')),
+                    'sample_time_id': time_id(message.get('sample_time')),
+                    'num_points': len(message['spectrum']) // 4,
+                    'axis': message['spectrum_axis'],
+                    'values': message['spectrum'],
+                })
+                spectra.append(spectrum)
+                continue
+            measurement = dict(ids)
+            measurement.update({
                 'sample_time': message.get('sample_time'),
-                'acquisition_time_id': self.get_or_create_time_dimension(message.get('acquisition_time')),
-                'instrument_time_id': self.get_or_create_time_dimension(message.get('instrument_time')),
-                'sample_time_id': self.get_or_create_time_dimension(message.get('sample_time')),
+                'acquisition_time_id': time_id(message.get('acquisition_time')),
+                'instrument_time_id': time_id(message.get('instrument_time')),
+                'sample_time_id': time_id(message.get('sample_time')),
                 'value': message.get('value'),
                 'string': message.get('string'),
                 'alarms': message.get('alarms',[])
-            }
+            })
             measurements.append(measurement)
             # if the measurement is a GPS cordinate, prepare the coordinate for the geolocation dimension table
             if message.get('acquisition_type') == 'GPS' and message['value']:
                 coordinate = {
                     'platform_id': measurement['platform_id'],
                     'instrument_id': measurement['instrument_id'],
-                    'sample_time_id': self.get_or_create_time_dimension(message.get('sample_time')),
+                    'sample_time_id': measurement['sample_time_id'],
                     message['parameter']: message['value']
                 }
                 coordinates.append(coordinate)
-        measurements = self.batch_insert_measurements(measurements)
+        self.insert_rows(measurements, spectra, coordinates)
+        self.session.commit()
+
+    def insert_columns(self, columns_list):
+        """Insert wire format messages (WireColumns) straight from their columns.
+
+        Each message's schema and time tables are resolved to dimension and time IDs once;
+        the rows are then built from the per-record index columns.
+        """
+        measurements = []
+        coordinates = []
+        self.ensure_session_ready()
+        self.session.begin()
+        for columns in columns_list:
+            strings = columns.strings
+            schema_ids = []
+            gps_parameters = []  # the GPS parameter name of each schema, or None
+            for schema in columns.schemas:
+                platform, instrument, parameter, unit, acquisition_type = (strings[i] for i in schema)
+                schema_ids.append(self.get_dimension_ids(platform, instrument, parameter, unit, acquisition_type))
+                gps_parameters.append(parameter if acquisition_type == 'GPS' else None)
+            time_ids = [self.get_or_create_time_dimension(t) for t in columns.times]
+            times = columns.times
+            alarms = defaultdict(list)
+            for i, level, alarm_type, message, data_impacted, alarm_event, duration_secs in columns.alarms:
+                alarms[i].append({
+                    'alarm_level': strings[level],
+                    'alarm_type': strings[alarm_type],
+                    'alarm_message': strings[message],
+                    'data_impacted': bool(data_impacted),
+                    'alarm_event': None if alarm_event == NONE else strings[alarm_event],
+                    'duration_secs': None if duration_secs != duration_secs else duration_secs,
+                })
+            for i, (schema, acquisition_idx, sample_idx, instrument_idx, flags, value, string_idx) in enumerate(zip(
+                    columns.schema, columns.acquisition_time, columns.sample_time, columns.instrument_time,
+                    columns.flags, columns.value, columns.string)):
+                measurement = dict(schema_ids[schema])
+                measurement['sample_time'] = None if sample_idx == NONE else times[sample_idx]
+                measurement['acquisition_time_id'] = None if acquisition_idx == NONE else time_ids[acquisition_idx]
+                measurement['instrument_time_id'] = None if instrument_idx == NONE else time_ids[instrument_idx]
+                measurement['sample_time_id'] = None if sample_idx == NONE else time_ids[sample_idx]
+                measurement['value'] = value if flags & HAS_VALUE else None
+                measurement['string'] = strings[string_idx] if flags & HAS_STRING else None
+                measurement['alarms'] = alarms.get(i, [])
+                measurements.append(measurement)
+                parameter = gps_parameters[schema]
+                if parameter is not None and flags & HAS_VALUE and value:
+                    coordinates.append({
+                        'platform_id': measurement['platform_id'],
+                        'instrument_id': measurement['instrument_id'],
+                        'sample_time_id': measurement['sample_time_id'],
+                        parameter: value
+                    })
+        self.insert_rows(measurements, [], coordinates)
+        self.session.commit()
+
+    def insert_rows(self, measurements, spectra, coordinates):
+        alarms = []
+        if measurements:
+            measurements = self.batch_insert_measurements(measurements)
         # THE INSTRUMENT MEASUREMENT TABLE UPDATE IS NOT RIGHT
         # DISABLING UNTIL IT'S FIXED
         #self.batch_update_instrument_measurements(measurements)
@@ -329,22 +435,26 @@ class Inserter:
                     'measurement_id': measurement['id'],
                     'instrument_id': measurement['instrument_id'],
                     'parameter_id': measurement['parameter_id'],
-                    'sample_time_id': self.get_or_create_time_dimension(measurement['sample_time']),
+                    'sample_time_id': measurement['sample_time_id'],
                     'alarm_type_id': self.get_or_create_dimension(DimAlarmType, 'alarm_type', alarm['alarm_type'], 'alarm_type'),
                     'alarm_level_id': self.get_or_create_dimension(DimAlarmLevel, 'alarm_level', alarm['alarm_level'], 'alarm_level'),
                     'data_impacted': alarm['data_impacted'],           
-                    'alarm_message': alarm['alarm_message'],           
+                    'message': alarm['alarm_message'],           
                 }
+                if self.alarm_events:
+                    alarm_rec['alarm_event'] = alarm.get('alarm_event')
+                    alarm_rec['duration_secs'] = alarm.get('duration_secs')
                 alarms.append(alarm_rec)
         self.batch_insert_alarms(alarms)
+        self.batch_insert_spectra(spectra)
         if coordinates:
             geolocations = self.merge_gps_coordinates(coordinates)
             self.batch_insert_geolocations(geolocations) 
-        self.session.commit()
         
     def insert_batch(self, batch):
         #unpack internal lists from batch
         newbatch = []
+        columns_list = []
         time_start = datetime.now()
         if batch:
             for r in batch:
@@ -352,22 +462,30 @@ class Inserter:
                     newbatch += r
                 elif isinstance(r,dict):
                     newbatch.append(r)
-            batch = newbatch        
-        numRecords = len(batch)
-        earliest_time = min(batch,key=lambda x:x['sample_time'])['sample_time'].replace(microsecond=0)
-        latest_time = max(batch,key=lambda x:x['sample_time'])['sample_time'].replace(microsecond=0)
-        times = []
-        mid_time = earliest_time
-        while mid_time <= latest_time:
-            times.append(mid_time)
-            mid_time += timedelta(seconds=self.insert_batch_seconds)
-        for time in times:
-            sub_batch = [rec for rec in batch if rec['sample_time'].replace(microsecond=0) == time]
-            batch = [rec for rec in batch if rec['sample_time'].replace(microsecond=0) != time]
-            if len(sub_batch) > 0:
-                self.insert_subbatch(sub_batch)   
+                elif isinstance(r, WireColumns):
+                    columns_list.append(r)
+            batch = newbatch
+            # submission files hold the lists of whole batches, wire messages included
+            columns_list += [r for r in batch if isinstance(r, WireColumns)]
+            batch = [r for r in batch if isinstance(r, dict)]
+        numRecords = len(batch) + sum(len(columns) for columns in columns_list)
+        if columns_list:
+            self.insert_columns(columns_list)
+        if batch:
+            earliest_time = min(batch,key=lambda x:x['sample_time'])['sample_time'].replace(microsecond=0)
+            latest_time = max(batch,key=lambda x:x['sample_time'])['sample_time'].replace(microsecond=0)
+            times = []
+            mid_time = earliest_time
+            while mid_time <= latest_time:
+                times.append(mid_time)
+                mid_time += timedelta(seconds=self.insert_batch_seconds)
+            for time in times:
+                sub_batch = [rec for rec in batch if rec['sample_time'].replace(microsecond=0) == time]
+                batch = [rec for rec in batch if rec['sample_time'].replace(microsecond=0) != time]
+                if len(sub_batch) > 0:
+                    self.insert_subbatch(sub_batch)   
         exec_secs = (datetime.now()-time_start).total_seconds()
-        self.logger.info(f"batch: {numRecords} inserted, insert took {exec_secs} seconds, {exec_secs/numRecords} secs per record")
+        self.logger.info(f"batch: {numRecords} inserted, insert took {exec_secs} seconds, {exec_secs/max(numRecords, 1)} secs per record")
         
 def submit_measurement(measurement, submit_time, config):
     # collect measurements, and store into files at configured intervals  
@@ -404,7 +522,7 @@ def open_queue(config, logger):
     qExists = False
     # check if queue already exists
     try:
-        queue = posixmq.Queue(myQname)
+        queue = posixmq.Queue(myQname, serializer=WireSerializer)
         qExists = True
     except OSError as e:
         logger.debug('Queue does not yet exist')
@@ -418,7 +536,7 @@ def open_queue(config, logger):
             qExists = False
     if not qExists:
         # create the queue if it doesn't exist or has been detroyed
-        queue = posixmq.Queue(myQname, maxsize=myMaxMsgs, maxmsgsize=myMaxMsgSize)
+        queue = posixmq.Queue(myQname, maxsize=myMaxMsgs, maxmsgsize=myMaxMsgSize, serializer=WireSerializer)
     # KLUDGE-- bug in posixmq-- does not update internal member variables
     # _max_msg_size and _maxsize to match actual queue attributes, but uses them to 
     # size the receive buffer, causing "too big" error on large messages.  Set these variables.
@@ -542,17 +660,24 @@ queued_recs_to_batch = config.get('queued_recs_to_batch', 1000)
 while True:
     message = []
     if collector_input == 'queue':
-        while len(message) < queued_recs_to_batch:
+        num_records = 0
+        while num_records < queued_recs_to_batch:
             try:
                 logger.debug(f'Collector queue size = {queue.qsize()}')
                 record = queue.get()
                 # GPS acquireres package their coordinates as lists
                 # to keep coords from being separated in batching
-                if isinstance(record,list):
+                if isinstance(record, WireColumns):
+                    # kept as columns, the inserter reads them directly
+                    message.append(record)
+                    num_records += len(record)
+                elif isinstance(record,list):
                     for r in record:
                         message.append(r)
+                    num_records += len(record)
                 else:
                     message.append(record)
+                    num_records += 1
                 #continue
             except Exception as e:
                 logger.error("exception in get from queue")
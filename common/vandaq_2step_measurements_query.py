@@ -869,19 +869,21 @@ def get_alarm_table(engine, start_time=date.today(), end_time=None, platform=Non
 
 
     # Step 3: Main query
+    columns = [
+        DimPlatform.platform,
+        DimTime.time,
+        DimInstrument.instrument,
+        DimAlarmLevel.alarm_level,
+        DimAlarmType.alarm_type,
+        DimParameter.parameter,
+        FactAlarm.message,
+        FactAlarm.data_impacted,
+    ]
+    if has_alarm_event_columns(engine):
+        columns += [FactAlarm.alarm_event, FactAlarm.duration_secs]
+    columns += [FactMeasurement.value, FactMeasurement.string]
     query = (
-        select(
-            DimPlatform.platform,
-            DimTime.time,
-            DimInstrument.instrument,
-            DimAlarmLevel.alarm_level,
-            DimAlarmType.alarm_type,
-            DimParameter.parameter,
-            FactAlarm.message,
-            FactAlarm.data_impacted,
-            FactMeasurement.value,
-            FactMeasurement.string
-        )
+        select(*columns)
         .join(DimTime, FactAlarm.sample_time_id == DimTime.id)
         .join(DimInstrument, FactAlarm.instrument_id == DimInstrument.id)
         .join(DimParameter, FactAlarm.parameter_id == DimParameter.id)
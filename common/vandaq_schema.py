@@ -10,7 +10,7 @@ Copyright (c) 2025 The Regents of the University of California
 Released under the BSD 3-Clause License.
 """
 
-from sqlalchemy import  Column, Integer, Boolean, BigInteger, Double, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import  inspect, Column, Integer, Boolean, BigInteger, Double, String, DateTime, ForeignKey, UniqueConstraint, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 
@@ -120,6 +120,39 @@ class FactMeasurement(Base):
     unit = relationship("DimUnit", foreign_keys=[unit_id])
     acquisition_type = relationship("DimAcquisitionType", foreign_keys=[acquisition_type_id])
 
+# Fact Table for array measurements (e.g. a whole mass spectrum per sample)
+# axis and values are little-endian float32 arrays of num_points each
+class FactSpectrum(Base):
+    __tablename__ = 'spectrum'
+    id = Column(BigInteger, primary_key=True)
+
+    # Foreign keys to the DimTime table
+    acquisition_time_id = Column(BigInteger, ForeignKey('time.id'), nullable=False)
+    instrument_time_id = Column(BigInteger, ForeignKey('time.id'), nullable=True)
+    sample_time_id = Column(BigInteger, ForeignKey('time.id'), nullable=False)
+    sample_time = Column(DateTime , nullable=False, unique=False)
+
+    # Other foreign keys
+    platform_id = Column(Integer, ForeignKey('platform.id'), nullable=False)
+    instrument_id = Column(Integer, ForeignKey('instrument.id'), nullable=False)
+    parameter_id = Column(Integer, ForeignKey('parameter.id'), nullable=False)
+    unit_id = Column(Integer, ForeignKey('unit.id'), nullable=False)
+    acquisition_type_id = Column(Integer, ForeignKey('acquisition_type.id'), nullable=False)
+
+    num_points = Column(Integer, nullable=False)
+    axis = Column(LargeBinary, nullable=False)
+    values = Column(LargeBinary, nullable=False)
+
+    acquisition_time = relationship("DimTime", foreign_keys=[acquisition_time_id])
+    instrument_time = relationship("DimTime", foreign_keys=[instrument_time_id])
+    sample_time_f = relationship("DimTime", foreign_keys=[sample_time_id])
+
+    platform = relationship("DimPlatform", foreign_keys=[platform_id])
+    instrument = relationship("DimInstrument", foreign_keys=[instrument_id])
+    parameter = relationship("DimParameter", foreign_keys=[parameter_id])
+    unit = relationship("DimUnit", foreign_keys=[unit_id])
+    acquisition_type = relationship("DimAcquisitionType", foreign_keys=[acquisition_type_id])
+
 # Dimension Table for alarm level
 class DimAlarmLevel(Base):
     __tablename__ = 'alarm_level'
@@ -150,6 +183,9 @@ class FactAlarm(Base):
     alarm_level_id = Column(Integer, ForeignKey('alarm_level.id'), nullable=False)
     data_impacted = Column(Boolean, nullable=False)
     message = Column(String , nullable=False, unique=False)
+    # set for alarm_mode: events -- 'raised', 'active' (heartbeat) or 'cleared'
+    alarm_event = Column(String, nullable=True)
+    duration_secs = Column(Double, nullable=True)
 
     # Explicit relationships with unambiguous foreign keys
     sample_time = relationship("DimTime", foreign_keys=[sample_time_id])
@@ -160,6 +196,11 @@ class FactAlarm(Base):
     alarm_type = relationship("DimAlarmType", foreign_keys=[alarm_type_id])
     alarm_level = relationship("DimAlarmLevel", foreign_keys=[alarm_level_id])
 
+def has_alarm_event_columns(bind):
+    # databases created before alarm events lack these columns until they are added by hand
+    columns = {column['name'] for column in inspect(bind).get_columns(FactAlarm.__tablename__)}
+    return {'alarm_event', 'duration_secs'} <= columns
+
 class ViewMeasurementAndAlarm(Base):
     __tablename__ = 'measurement_alarm_view'
     measurement_id= Column(BigInteger, primary_key=True)
@@ -0,0 +1,288 @@
+"""
+
+VanDAQ
+Mobile Atmospheric Data Acquisition System
+
+Author: Robert Jay (Robin) Weber
+Affiliation: University of California, Berkeley
+
+Copyright (c) 2025 The Regents of the University of California
+Released under the BSD 3-Clause License.
+"""
+
+# Compact columnar binary format for measurement records on the acquirer -> collector queue.
+#
+# A message carries the records of one or more readings as columns. Strings (platform,
+# instrument, parameter, unit, acquisition type, string values, alarm fields) are stored
+# once in a string table, each distinct (platform, instrument, parameter, unit,
+# acquisition_type) combination once in a schema table, and each distinct timestamp once
+# as integer microseconds since 1970-01-01 (times are naive, as the acquirers make them).
+# Records then only hold small indexes into those tables plus their value.
+#
+# Layout, little-endian:
+#   header   4s magic, H strings, H schemas, H times, H records, H alarms
+#   strings  per string: H byte length, utf-8 bytes
+#   schemas  per schema: 5 H string indexes
+#   times    per time: q microseconds
+#   records  H schema[n], H acquisition_time[n], H sample_time[n], H instrument_time[n],
+#            B flags[n], d value[n], H string[n]
+#   alarms   per alarm: H record, H alarm_level, H alarm_type, H alarm_message, B data_impacted,
+#            H alarm_event, d duration_secs (NaN when absent)
+# Index NONE (0xffff) stands for a missing time or string.
+
+import sys
+import struct
+import pickle
+from array import array
+from datetime import datetime, timedelta
+
+MAGIC = b'VDQ1'
+NONE = 0xffff
+MAX_ENTRIES = 0xfffe
+
+HAS_VALUE = 1
+HAS_STRING = 2
+
+header_struct = struct.Struct('<4sHHHHH')
+length_struct = struct.Struct('<H')
+alarm_struct = struct.Struct('<HHHHBHd')
+
+schema_keys = ('platform', 'instrument', 'parameter', 'unit', 'acquisition_type')
+record_keys = frozenset(schema_keys + ('acquisition_time', 'sample_time', 'instrument_time', 'value', 'string', 'alarms'))
+alarm_keys = frozenset(('alarm_level', 'alarm_type', 'alarm_message', 'data_impacted', 'alarm_event', 'duration_secs'))
+
+epoch = datetime(1970, 1, 1)
+
+# the columns are arrays, which are native-endian, so big-endian hosts swap them to the wire's order
+swap_columns = sys.byteorder != 'little'
+
+
+def column_bytes(col):
+    if swap_columns:
+        col = array(col.typecode, col)
+        col.byteswap()
+    return col.tobytes()
+
+
+def is_wire_message(data):
+    return data[:len(MAGIC)] == MAGIC
+
+
+class _Table:
+    """Assigns consecutive indexes to distinct hashable entries."""
+    def __init__(self):
+        self.index = {}
+        self.entries = []
+
+    def add(self, entry):
+        idx = self.index.get(entry)
+        if idx is None:
+            idx = len(self.entries)
+            if idx > MAX_ENTRIES:
+                raise ValueError('too many distinct entries for one wire message')
+            self.index[entry] = idx
+            self.entries.append(entry)
+        return idx
+
+
+def encode_records(records):
+    """Encode a list of measurement record dicts. Raises ValueError for records the format cannot carry."""
+    if len(records) > MAX_ENTRIES:
+        raise ValueError('too many records for one wire message')
+    strings = _Table()
+    schemas = {}  # {(platform, instrument, parameter, unit, acquisition_type): index}
+    schema_rows = []
+    times = {}  # {datetime: index}
+
+    def string_index(s):
+        if not isinstance(s, str):
+            raise ValueError(f'wire format carries str strings only, got {s!r}')
+        return strings.add(s)
+
+    def new_schema(schema):
+        schemas[schema] = len(schema_rows)
+        schema_rows.append([string_index(s) for s in schema])
+        return schemas[schema]
+
+    def new_time(t):
+        if t is None:
+            return NONE
+        if t.tzinfo is not None:
+            raise ValueError('wire format carries naive times only')
+        times[t] = len(times)
+        return times[t]
+
+    n = len(records)
+    schema_col = array('H')
+    acquisition_col = array('H')
+    sample_col = array('H')
+    instrument_col = array('H')
+    flags_col = array('B')
+    value_col = array('d')
+    string_col = array('H')
+    alarm_rows = []
+    nan = float('nan')
+    get_schema = schemas.get
+    get_time = times.get
+    for i, record in enumerate(records):
+        if not record_keys.issuperset(record):
+            raise ValueError(f'record keys not supported by wire format: {set(record) - record_keys}')
+        schema = (record['platform'], record['instrument'], record['parameter'], record['unit'], record['acquisition_type'])
+        idx = get_schema(schema)
+        schema_col.append(new_schema(schema) if idx is None else idx)
+        t = record.get('acquisition_time')
+        idx = get_time(t)
+        acquisition_col.append(new_time(t) if idx is None else idx)
+        t = record.get('sample_time')
+        idx = get_time(t)
+        sample_col.append(new_time(t) if idx is None else idx)
+        t = record.get('instrument_time')
+        idx = get_time(t)
+        instrument_col.append(new_time(t) if idx is None else idx)
+        flags = 0
+        value = record.get('value')
+        if value is not None:
+            flags = HAS_VALUE
+            value_col.append(value)
+        else:
+            value_col.append(nan)
+        string = record.get('string')
+        if string is not None:
+            flags |= HAS_STRING
+            string_col.append(string_index(string))
+        else:
+            string_col.append(NONE)
+        flags_col.append(flags)
+        alarms = record.get('alarms')
+        if alarms:
+            for alarm in alarms:
+                if not alarm_keys.issuperset(alarm):
+                    raise ValueError(f'alarm keys not supported by wire format: {set(alarm) - alarm_keys}')
+                alarm_event = alarm.get('alarm_event')
+                duration_secs = alarm.get('duration_secs')
+                alarm_rows.append((i, string_index(alarm['alarm_level']), string_index(alarm['alarm_type']),
+                                   string_index(alarm['alarm_message']), 1 if alarm.get('data_impacted', True) else 0,
+                                   NONE if alarm_event is None else string_index(alarm_event),
+                                   nan if duration_secs is None else duration_secs))
+    if len(alarm_rows) > MAX_ENTRIES:
+        raise ValueError('too many alarms for one wire message')
+
+    if len(schema_rows) > MAX_ENTRIES or len(times) > MAX_ENTRIES:
+        raise ValueError('too many distinct schemas or times for one wire message')
+
+    parts = [header_struct.pack(MAGIC, len(strings.entries), len(schema_rows), len(times), n, len(alarm_rows))]
+    for s in strings.entries:
+        encoded = s.encode('utf-8')
+        parts.append(length_struct.pack(len(encoded)))
+        parts.append(encoded)
+    parts.append(column_bytes(array('H', [idx for row in schema_rows for idx in row])))
+    parts.append(column_bytes(array('q', [(t - epoch) // timedelta(microseconds=1) for t in times])))
+    for col in (schema_col, acquisition_col, sample_col, instrument_col, flags_col, value_col, string_col):
+        parts.append(column_bytes(col))
+    for row in alarm_rows:
+        parts.append(alarm_struct.pack(*row))
+    return b''.join(parts)
+
+
+class WireColumns:
+    """A decoded wire message: the string, schema and time tables plus one array per record column."""
+    def __init__(self, strings, schemas, times, schema, acquisition_time, sample_time, instrument_time, flags, value, string, alarms):
+        self.strings = strings
+        self.schemas = schemas
+        self.times = times
+        self.schema = schema
+        self.acquisition_time = acquisition_time
+        self.sample_time = sample_time
+        self.instrument_time = instrument_time
+        self.flags = flags
+        self.value = value
+        self.string = string
+        self.alarms = alarms
+
+    def __len__(self):
+        return len(self.schema)
+
+    def records(self):
+        """Expand to the record dicts the acquirer sent (string and datetime objects are shared between records)."""
+        strings = self.strings
+        times = self.times
+        def t(idx):
+            return None if idx == NONE else times[idx]
+        templates = [dict(zip(schema_keys, (strings[i] for i in schema))) for schema in self.schemas]
+        records = []
+        for i in range(len(self.schema)):
+            record = dict(templates[self.schema[i]])
+            record['acquisition_time'] = t(self.acquisition_time[i])
+            record['sample_time'] = t(self.sample_time[i])
+            record['instrument_time'] = t(self.instrument_time[i])
+            flags = self.flags[i]
+            if flags & HAS_VALUE:
+                record['value'] = self.value[i]
+            if flags & HAS_STRING:
+                record['string'] = strings[self.string[i]]
+            records.append(record)
+        for i, level, alarm_type, message, data_impacted, alarm_event, duration_secs in self.alarms:
+            alarm = {
+                'alarm_level': strings[level],
+                'alarm_type': strings[alarm_type],
+                'alarm_message': strings[message],
+                'data_impacted': bool(data_impacted),
+            }
+            if alarm_event != NONE:
+                alarm['alarm_event'] = strings[alarm_event]
+            if duration_secs == duration_secs:  # not NaN
+                alarm['duration_secs'] = duration_secs
+            records[i].setdefault('alarms', []).append(alarm)
+        return records
+
+
+def decode_columns(data):
+    """Decode a wire message into WireColumns."""
+    magic, n_strings, n_schemas, n_times, n, n_alarms = header_struct.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError('not a wire message')
+    view = memoryview(data)
+    offset = header_struct.size
+    strings = []
+    for _ in range(n_strings):
+        (length,) = length_struct.unpack_from(data, offset)
+        offset += length_struct.size
+        strings.append(str(view[offset:offset + length], 'utf-8'))
+        offset += length
+
+    def column(typecode, count):
+        nonlocal offset
+        col = array(typecode)
+        size = col.itemsize * count
+        col.frombytes(view[offset:offset + size])
+        if swap_columns:
+            col.byteswap()
+        offset += size
+        return col
+
+    flat = column('H', 5 * n_schemas)
+    schemas = [tuple(flat[i:i + 5]) for i in range(0, len(flat), 5)]
+    times = [epoch + timedelta(microseconds=us) for us in column('q', n_times)]
+    schema = column('H', n)
+    acquisition_time = column('H', n)
+    sample_time = column('H', n)
+    instrument_time = column('H', n)
+    flags = column('B', n)
+    value = column('d', n)
+    string = column('H', n)
+    alarms = list(alarm_struct.iter_unpack(view[offset:offset + alarm_struct.size * n_alarms]))
+    return WireColumns(strings, schemas, times, schema, acquisition_time, sample_time, instrument_time, flags, value, string, alarms)
+
+
+class WireSerializer:
+    """ipcqueue serializer for reading the measurement queue: wire messages are decoded
+    to WireColumns, anything else is unpickled as ipcqueue's PickleSerializer does."""
+    @staticmethod
+    def dumps(obj):
+        return pickle.dumps(obj, protocol=1)
+
+    @staticmethod
+    def loads(data):
+        if is_wire_message(data):
+            return decode_columns(data)
+        return pickle.loads(data)
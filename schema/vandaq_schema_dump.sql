@@ -82,7 +82,9 @@ CREATE TABLE public.alarm (
     parameter_id integer,
     data_impacted boolean NOT NULL,
     message character varying,
-    measurement_id bigint
+    measurement_id bigint,
+    alarm_event character varying,
+    duration_secs double precision
 );
 
 
@@ -212,6 +214,50 @@ CREATE TABLE public.platform (
 
 ALTER TABLE public.platform OWNER TO postgres;
 
+--
+-- Name: spectrum; Type: TABLE; Schema: public; Owner: postgres
+--
+
+CREATE TABLE public.spectrum (
+    id bigint NOT NULL,
+    acquisition_time_id bigint NOT NULL,
+    instrument_time_id bigint,
+    sample_time_id bigint NOT NULL,
+    sample_time timestamp without time zone NOT NULL,
+    platform_id integer NOT NULL,
+    instrument_id integer NOT NULL,
+    parameter_id integer NOT NULL,
+    unit_id integer NOT NULL,
+    acquisition_type_id integer NOT NULL,
+    num_points integer NOT NULL,
+    axis bytea NOT NULL,
+    "values" bytea NOT NULL
+);
+
+
+ALTER TABLE public.spectrum OWNER TO postgres;
+
+--
+-- Name: spectrum_id_seq; Type: SEQUENCE; Schema: public; Owner: postgres
+--
+
+CREATE SEQUENCE public.spectrum_id_seq
+    START WITH 1
+    INCREMENT BY 1
+    NO MINVALUE
+    NO MAXVALUE
+    CACHE 1;
+
+
+ALTER TABLE public.spectrum_id_seq OWNER TO postgres;
+
+--
+-- Name: spectrum_id_seq; Type: SEQUENCE OWNED BY; Schema: public; Owner: postgres
+--
+
+ALTER SEQUENCE public.spectrum_id_seq OWNED BY public.spectrum.id;
+
+
 --
 -- Name: time; Type: TABLE; Schema: public; Owner: postgres
 --
@@ -237,6 +283,8 @@ CREATE VIEW public.alarms_view AS
     t.alarm_type,
     a.data_impacted,
     a.message,
+    a.alarm_event,
+    a.duration_secs,
     m.value
    FROM (((((((public.alarm a
      JOIN public.instrument i ON ((a.instrument_id = i.id)))
@@ -599,6 +647,13 @@ ALTER TABLE ONLY public.instrument_measurements ALTER COLUMN id SET DEFAULT next
 ALTER TABLE ONLY public.measurement ALTER COLUMN id SET DEFAULT nextval('public.measurement_id_seq'::regclass);
 
 
+--
+-- Name: spectrum id; Type: DEFAULT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.spectrum ALTER COLUMN id SET DEFAULT nextval('public.spectrum_id_seq'::regclass);
+
+
 --
 -- Name: parameter id; Type: DEFAULT; Schema: public; Owner: postgres
 --
@@ -723,6 +778,14 @@ ALTER TABLE ONLY public.measurement
     ADD CONSTRAINT measurement_pkey PRIMARY KEY (id);
 
 
+--
+-- Name: spectrum spectrum_pkey; Type: CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.spectrum
+    ADD CONSTRAINT spectrum_pkey PRIMARY KEY (id);
+
+
 --
 -- Name: parameter parameter_parameter_key; Type: CONSTRAINT; Schema: public; Owner: postgres
 --
@@ -920,6 +983,20 @@ CREATE INDEX idx_platform_id ON public.platform USING btree (id) WITH (deduplica
 CREATE INDEX idx_sample_time_id ON public.measurement USING btree (sample_time_id) WITH (deduplicate_items='true');
 
 
+--
+-- Name: idx_spectrum_sample_time; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX idx_spectrum_sample_time ON public.spectrum USING brin (sample_time) WITH (autosummarize='false');
+
+
+--
+-- Name: idx_spectrum_instrument_id; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX idx_spectrum_instrument_id ON public.spectrum USING btree (instrument_id) WITH (deduplicate_items='true');
+
+
 --
 -- Name: idx_time; Type: INDEX; Schema: public; Owner: postgres
 --
@@ -1116,6 +1193,70 @@ ALTER TABLE ONLY public.measurement
     ADD CONSTRAINT measurement_unit_id_fkey FOREIGN KEY (unit_id) REFERENCES public.unit(id);
 
 
+--
+-- Name: spectrum spectrum_acquisition_time_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.spectrum
+    ADD CONSTRAINT spectrum_acquisition_time_id_fkey FOREIGN KEY (acquisition_time_id) REFERENCES public."time"(id);
+
+
+--
+-- Name: spectrum spectrum_instrument_time_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.spectrum
+    ADD CONSTRAINT spectrum_instrument_time_id_fkey FOREIGN KEY (instrument_time_id) REFERENCES public."time"(id);
+
+
+--
+-- Name: spectrum spectrum_sample_time_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.spectrum
+    ADD CONSTRAINT spectrum_sample_time_id_fkey FOREIGN KEY (sample_time_id) REFERENCES public."time"(id);
+
+
+--
+-- Name: spectrum spectrum_platform_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.spectrum
+    ADD CONSTRAINT spectrum_platform_id_fkey FOREIGN KEY (platform_id) REFERENCES public.platform(id);
+
+
+--
+-- Name: spectrum spectrum_instrument_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.spectrum
+    ADD CONSTRAINT spectrum_instrument_id_fkey FOREIGN KEY (instrument_id) REFERENCES public.instrument(id);
+
+
+--
+-- Name: spectrum spectrum_parameter_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.spectrum
+    ADD CONSTRAINT spectrum_parameter_id_fkey FOREIGN KEY (parameter_id) REFERENCES public.parameter(id);
+
+
+--
+-- Name: spectrum spectrum_unit_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.spectrum
+    ADD CONSTRAINT spectrum_unit_id_fkey FOREIGN KEY (unit_id) REFERENCES public.unit(id);
+
+
+--
+-- Name: spectrum spectrum_acquisition_type_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.spectrum
+    ADD CONSTRAINT spectrum_acquisition_type_id_fkey FOREIGN KEY (acquisition_type_id) REFERENCES public.acquisition_type(id);
+
+
 --
 -- Name: alarm parameter_id_fk; Type: FK CONSTRAINT; Schema: public; Owner: postgres
 --
@@ -14,6 +14,7 @@ import sys
 import numpy as np
 import zmq
 import pickle
+import msgpack
 import requests
 import asyncio
 import aiohttp
@@ -41,6 +42,7 @@ eng_codes = [{'name':'Interlock', "ID": "INTERLOCK_MON", "CAN": "3020070901"},
 # Define the IP and port of the server to connect to
 HOST = '169.229.157.5'     # Replace with the server's IP address
 PORT = 6969                # Should match the server's port
+CODEC = 'msgpack'          # Should match network.codec in the acquirer config ('msgpack' or 'pickle')
 
 TwLoadDll()
 
@@ -62,6 +64,11 @@ def check_socket_open():
     return socket_open
 
 
+def encode_message(messageDict):
+    if CODEC == 'msgpack':
+        return msgpack.packb(messageDict, use_bin_type=True)
+    return pickle.dumps(messageDict)
+
 def process_engineering_codes(codes):
     urls = []
     cans = {}
@@ -148,7 +155,7 @@ async def main(urls,cans):
                             if eng_vals:
                                 messageDict['eng'] = eng_vals
                             replies = []
-                        message = pickle.dumps(messageDict)
+                        message = encode_message(messageDict)
                         try:
                             client_socket.send(message)
                             print(str(messageDict))